@@ -1,17 +1,24 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import google.generativeai as genai
 import os
-import json
 import uvicorn
 import asyncio
 import logging
-import re
+import hashlib
+import uuid
 from dotenv import load_dotenv
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime
+from highlighter import highlight_important_words
+from formatter import StreamingFormatter, format_response
+from streaming import stop_on_disconnect, Broadcaster, ReplayStore
+from llm_client import get_client
+from response_cache import ResponseCache, normalize_question
+from sessions import SessionStore
+from sse import SSEWriter, parse_event_id
+import metrics
 
 # Load environment variables
 load_dotenv()
@@ -32,18 +39,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure Gemini API
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("Please set GEMINI_API_KEY in your .env file")
-
-genai.configure(api_key=GEMINI_API_KEY)
-
-# Initialize Gemini model for streaming
-streaming_model = genai.GenerativeModel('gemini-1.5-flash')
+# Shared Gemini client (configured from GEMINI_API_KEY)
+llm = get_client()
 
 logger.info("Gemini AI configured successfully for StudyPal Chat")
 
+# Pause after a streamed line in "typing" pacing, keyed by the character that completed it
+TYPING_DELAYS = {
+    '.': 0.15,  # Longer pause after sentences
+    '!': 0.15,
+    '?': 0.15,
+    '\n': 0.08,  # Pause for line breaks
+    ':': 0.06,  # Pause after colons
+}
+
+# Response cache for repeated questions (set CHAT_CACHE_PATH to keep answers across restarts)
+CHAT_CACHE_SIZE = int(os.getenv("CHAT_CACHE_SIZE", "512"))
+CHAT_CACHE_TTL = float(os.getenv("CHAT_CACHE_TTL", "86400"))
+CHAT_CACHE_PATH = os.getenv("CHAT_CACHE_PATH")
+
+# Conversation memory per session_id: recent turns kept, prompt token budget, idle expiry
+CHAT_SESSION_TURNS = int(os.getenv("CHAT_SESSION_TURNS", "10"))
+CHAT_SESSION_TOKEN_BUDGET = int(os.getenv("CHAT_SESSION_TOKEN_BUDGET", "2000"))
+CHAT_SESSION_TTL = float(os.getenv("CHAT_SESSION_TTL", "1800"))
+CHAT_MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", "10000"))
+
+# Events produced within this window are sent to the client in one write
+CHAT_SSE_FLUSH_WINDOW = float(os.getenv("CHAT_SSE_FLUSH_WINDOW", "0.01"))
+
+# Resumable streams: events kept per stream, how long an abandoned stream keeps generating,
+# and how long a finished stream can still be replayed
+CHAT_REPLAY_MAX_EVENTS = int(os.getenv("CHAT_REPLAY_MAX_EVENTS", "2000"))
+CHAT_RESUME_GRACE = float(os.getenv("CHAT_RESUME_GRACE", "10"))
+CHAT_REPLAY_TTL = float(os.getenv("CHAT_REPLAY_TTL", "60"))
+CHAT_REPLAY_MAX_STREAMS = int(os.getenv("CHAT_REPLAY_MAX_STREAMS", "256"))
+
+# Characters per chunk when replaying a cached answer as a stream
+REPLAY_CHUNK_SIZE = 40
+
 # ----------------------------
 # Pydantic Models
 # ----------------------------
@@ -52,6 +85,7 @@ class ChatMessage(BaseModel):
     message: str
     session_id: Optional[str] = None
     user_id: Optional[str] = "default"
+    pacing: Optional[Literal["raw", "coalesced", "typing"]] = "typing"
 
 class ChatResponse(BaseModel):
     response: str
@@ -66,75 +100,24 @@ class StudyPalChat:
     """StudyPal Chat with streaming and word highlighting"""
     
     def __init__(self):
-        self.model = streaming_model
+        self.llm = llm
+        self.cache = ResponseCache(
+            max_entries=CHAT_CACHE_SIZE,
+            ttl_seconds=CHAT_CACHE_TTL,
+            disk_path=CHAT_CACHE_PATH
+        )
+        self.sessions = SessionStore(
+            max_turns=CHAT_SESSION_TURNS,
+            token_budget=CHAT_SESSION_TOKEN_BUDGET,
+            ttl_seconds=CHAT_SESSION_TTL,
+            max_sessions=CHAT_MAX_SESSIONS
+        )
+        # Live Gemini streams keyed by normalized question, shared by identical requests
+        self.in_flight = {}
     
     def highlight_important_words(self, text: str) -> str:
         """Add highlighting to important words in the response"""
-        
-        # Define patterns for important words/phrases to highlight
-        highlight_patterns = [
-            # Academic terms
-            r'\b(definition|theorem|formula|equation|concept|principle|theory|hypothesis|analysis|conclusion|method|approach|technique|strategy)\b',
-            # Programming terms
-            r'\b(function|variable|array|object|class|method|algorithm|syntax|debugging|compilation|loop|condition|statement)\b',
-            # Math terms
-            r'\b(derivative|integral|matrix|vector|polynomial|exponential|logarithm|trigonometry|algebra|geometry|calculus)\b',
-            # Science terms
-            r'\b(molecule|atom|electron|photon|DNA|RNA|protein|enzyme|catalyst|reaction|hypothesis|experiment|observation)\b',
-            # Important connectors and emphasis
-            r'\b(important|key|crucial|essential|fundamental|critical|significant|main|primary|basic|advanced|complex)\b',
-            r'\b(always|never|must|should|cannot|will not|definitely|absolutely|typically|usually|often|rarely)\b',
-            # Study and learning terms
-            r'\b(study|learn|practice|review|understand|memorize|analyze|solve|calculate|explain|demonstrate|apply)\b',
-            # Question and answer terms
-            r'\b(question|answer|solution|problem|example|step|process|procedure|instruction|guide|tutorial)\b',
-            # Organizational terms
-            r'\b(first|second|third|next|then|finally|conclusion|summary|overview|introduction|background)\b'
-        ]
-        
-        highlighted_text = text
-        
-        # Apply highlighting using markdown bold formatting
-        for pattern in highlight_patterns:
-            highlighted_text = re.sub(
-                pattern,
-                r'**\1**',
-                highlighted_text,
-                flags=re.IGNORECASE
-            )
-        
-        # Highlight code snippets and technical terms in backticks
-        highlighted_text = re.sub(
-            r'`([^`]+)`',
-            r'**`\1`**',
-            highlighted_text
-        )
-        
-        # Highlight numbers in educational context
-        highlighted_text = re.sub(
-            r'\b(\d+(?:\.\d+)?)\s*(percent|%|degrees|minutes|seconds|hours|days|years)\b',
-            r'**\1 \2**',
-            highlighted_text,
-            flags=re.IGNORECASE
-        )
-        
-        # Highlight numbered lists and steps
-        highlighted_text = re.sub(
-            r'^(\d+\.)\s',
-            r'**\1** ',
-            highlighted_text,
-            flags=re.MULTILINE
-        )
-        
-        # Highlight section markers
-        highlighted_text = re.sub(
-            r'\b(Step \d+|Part \d+|Section \d+|Chapter \d+)\b',
-            r'**\1**',
-            highlighted_text,
-            flags=re.IGNORECASE
-        )
-        
-        return highlighted_text
+        return highlight_important_words(text)
     
     def create_system_prompt(self) -> str:
         """Create system prompt for StudyPal Chat"""
@@ -197,86 +180,136 @@ Practical example here...
 
 Always format your responses with clear structure, headings, and bullet points to make learning easy and enjoyable!"""
     
-    async def generate_streaming_response(self, message: str, session_id: str = None):
-        """Generate streaming response with word highlighting"""
+    def create_prompt(self, message: str, context: str = "") -> str:
+        """Build the full prompt, including earlier turns of the conversation if any"""
+        system_prompt = self.create_system_prompt()
+        if context:
+            system_prompt += f"\n\nConversation so far:\n{context}"
+        return f"{system_prompt}\n\nStudent Question: {message}\n\nPlease provide a helpful response:"
+    
+    async def generate_streaming_response(self, message: str, session_id: str = None, pacing: str = "typing"):
+        """Generate streaming response with word highlighting
+        
+        pacing: "typing" adds natural pauses between lines, "raw" forwards each formatted line
+        as soon as it is complete, "coalesced" sends one event per model chunk with no pauses.
+        """
+        response = None
         try:
             logger.info(f"Processing streaming query: {message[:50]}...")
             
-            # Create the prompt
-            system_prompt = self.create_system_prompt()
-            full_prompt = f"{system_prompt}\n\nStudent Question: {message}\n\nPlease provide a helpful response:"
+            # Create the prompt, with earlier turns of this session
+            context = self.sessions.build_context(session_id)
+            full_prompt = self.create_prompt(message, context)
             
             # Yield initial status
             yield {
                 "type": "response_start",
                 "message": "Generating response...",
-                "session_id": session_id or "default"
+                "session_id": session_id
             }
             
-            # Generate streaming response using Gemini
-            response = self.model.generate_content(
-                full_prompt,
-                stream=True
-            )
+            # Replay a cached answer, or stream a new one from Gemini. Follow-ups depend on
+            # the conversation, so only context-free turns are cached or shared.
+            cached_answer = None if context else self.cache.get(message)
+            if cached_answer is not None:
+                response = self._replay_text_chunks(cached_answer)
+            elif context:
+                response = self._model_text_chunks(full_prompt)
+            else:
+                response = self._shared_model_text_chunks(message, full_prompt)
             
-            full_response = ""
+            raw_response = ""
             sentence_buffer = ""
             
-            for chunk in response:
-                if chunk.text:
+            # Content events carry formatted lines as they complete; the final event carries a
+            # digest of exactly that content instead of repeating the body
+            formatter = StreamingFormatter()
+            digest = hashlib.sha256()
+            response_length = 0
+            word_count = 0
+            
+            def record(formatted: str):
+                nonlocal response_length, word_count
+                digest.update(formatted.encode("utf-8"))
+                response_length += len(formatted)
+                word_count += len(formatted.split())
+            
+            # Whether highlighting applied to text not yet sent in a content event
+            highlighted = False
+            
+            async for text in response:
+                if text:
+                    raw_response += text
+                    
+                    # Formatted output from this chunk, sent together in coalesced mode
+                    chunk_output = []
+                    
                     # Process each character
-                    for char in chunk.text:
+                    for char in text:
                         sentence_buffer += char
                         
                         # Check if we have a complete sentence or significant chunk
                         if char in ['.', '!', '?', ':', '\n'] or len(sentence_buffer) >= 80:
-                            if sentence_buffer.strip():
-                                # Apply highlighting to the sentence buffer
-                                highlighted_sentence = self.highlight_important_words(sentence_buffer)
-                                full_response += highlighted_sentence
-                                
-                                # Yield the highlighted sentence
+                            # Apply highlighting to the sentence buffer; line breaks go to the formatter as they are
+                            highlighted_sentence = self.highlight_important_words(sentence_buffer) if sentence_buffer.strip() else sentence_buffer
+                            highlighted = highlighted or highlighted_sentence != sentence_buffer
+                            formatted = formatter.feed(highlighted_sentence)
+                            sentence_buffer = ""
+                            if not formatted:
+                                continue  # the formatter is waiting for the rest of the line
+                            
+                            record(formatted)
+                            if pacing == "coalesced":
+                                chunk_output.append(formatted)
+                            else:
+                                # Yield the formatted line(s)
                                 yield {
                                     "type": "content",
-                                    "content": highlighted_sentence,
-                                    "highlighted": highlighted_sentence != sentence_buffer
+                                    "content": formatted,
+                                    "highlighted": highlighted
                                 }
+                                highlighted = False
                                 
                                 # Add natural typing delay based on content
-                                if char in ['.', '!', '?']:
-                                    await asyncio.sleep(0.15)  # Longer pause after sentences
-                                elif char == '\n':
-                                    await asyncio.sleep(0.08)  # Pause for line breaks
-                                elif char == ':':
-                                    await asyncio.sleep(0.06)  # Pause after colons
-                                else:
-                                    await asyncio.sleep(0.04)  # Normal pause
-                            
-                            sentence_buffer = ""
-                        else:
-                            # For characters that are part of sentences, continue accumulating
-                            continue
+                                if pacing == "typing":
+                                    await asyncio.sleep(TYPING_DELAYS.get(char, 0.04))
+                    
+                    if chunk_output:
+                        yield {
+                            "type": "content",
+                            "content": "".join(chunk_output),
+                            "highlighted": highlighted
+                        }
+                        highlighted = False
             
-            # Process any remaining content in buffer
+            # Process any remaining content in buffer and flush the last formatted line
             if sentence_buffer.strip():
                 highlighted_sentence = self.highlight_important_words(sentence_buffer)
-                full_response += highlighted_sentence
+                highlighted = highlighted or highlighted_sentence != sentence_buffer
+                sentence_buffer = highlighted_sentence
+            formatted = formatter.feed(sentence_buffer) + formatter.finish()
+            if formatted:
+                record(formatted)
                 yield {
                     "type": "content",
-                    "content": highlighted_sentence,
-                    "highlighted": highlighted_sentence != sentence_buffer
+                    "content": formatted,
+                    "highlighted": highlighted
                 }
             
-            # Final processing - apply additional formatting
-            full_response = self.apply_final_formatting(full_response)
+            if cached_answer is None and not context and raw_response.strip():
+                self.cache.set(message, raw_response)
+            if raw_response.strip():
+                self.sessions.record_turn(session_id, message, raw_response)
             
             # Send completion signal
             yield {
                 "type": "complete",
                 "message": "Response completed",
-                "full_response": full_response,
-                "word_count": len(full_response.split()),
-                "session_id": session_id or "default"
+                "response_length": response_length,
+                "response_sha256": digest.hexdigest(),
+                "word_count": word_count,
+                "cached": cached_answer is not None,
+                "session_id": session_id
             }
             
             logger.info("Streaming response completed successfully")
@@ -288,52 +321,61 @@ Always format your responses with clear structure, headings, and bullet points t
                 "error": str(e),
                 "message": "An error occurred while generating the response"
             }
+        finally:
+            # Stops the Gemini stream if we were closed early (e.g. the client disconnected)
+            if response is not None:
+                await response.aclose()
     
-    def apply_final_formatting(self, text: str) -> str:
-        """Apply final formatting improvements to the response"""
-        
-        # Enhance section headers with better formatting
-        text = re.sub(r'^(#{1,3})\s*(.+)$', r'\1 **\2**', text, flags=re.MULTILINE)
-        
-        # Enhance bullet points with better formatting
-        text = re.sub(r'^(\*|\-)\s*(.+)$', r'• **\2**', text, flags=re.MULTILINE)
-        
-        # Enhance numbered lists
-        text = re.sub(r'^(\d+\.)\s*(.+)$', r'**\1** \2', text, flags=re.MULTILINE)
-        
-        # Highlight important phrases at the start of sentences
-        text = re.sub(
-            r'\b(Key point|Important|Note|Remember|Tip|Warning|Example|Summary|Conclusion):\s*',
-            r'**\1:** ',
-            text,
-            flags=re.IGNORECASE
-        )
-        
-        # Add spacing after headings
-        text = re.sub(r'^(#{1,3}\s+.+)$', r'\1\n', text, flags=re.MULTILINE)
-        
-        # Ensure proper spacing between sections
-        text = re.sub(r'\n(#{1,3}\s)', r'\n\n\1', text)
+    def _model_text_chunks(self, full_prompt: str):
+        """Stream answer text from Gemini without blocking the event loop"""
+        return self.llm.stream(full_prompt, site="chat.stream", priority="interactive")
+    
+    def _shared_model_text_chunks(self, message: str, full_prompt: str):
+        """Attach to the in-flight Gemini stream for an identical question, or start one"""
+        key = normalize_question(message)
+        flight = self.in_flight.get(key)
+        if flight is not None and flight.joinable:
+            metrics.increment("chat.singleflight.followers")
+            logger.info(f"Joining in-flight response for: {message[:50]}...")
+            return flight.subscribe()
         
-        # Clean up multiple newlines
-        text = re.sub(r'\n{3,}', '\n\n', text)
+        def release():
+            if self.in_flight.get(key) is flight:
+                del self.in_flight[key]
         
-        return text
+        metrics.increment("chat.singleflight.leaders")
+        flight = Broadcaster(self._model_text_chunks(full_prompt), on_done=release)
+        self.in_flight[key] = flight
+        return flight.subscribe()
+    
+    async def _replay_text_chunks(self, text: str):
+        """Replay a cached answer in model-sized chunks"""
+        for start in range(0, len(text), REPLAY_CHUNK_SIZE):
+            yield text[start:start + REPLAY_CHUNK_SIZE]
     
-    def generate_response(self, message: str, session_id: str = None) -> str:
+    def apply_final_formatting(self, text: str) -> str:
+        """Apply final formatting improvements to the response"""
+        return format_response(text)
+    
+    async def generate_response(self, message: str, session_id: str = None) -> str:
         """Generate non-streaming response with highlighting (fallback)"""
         try:
             logger.info(f"Processing non-streaming query: {message[:50]}...")
             
-            # Create the prompt
-            system_prompt = self.create_system_prompt()
-            full_prompt = f"{system_prompt}\n\nStudent Question: {message}\n\nPlease provide a helpful response:"
+            # Create the prompt, with earlier turns of this session
+            context = self.sessions.build_context(session_id)
+            full_prompt = self.create_prompt(message, context)
             
-            # Generate response using Gemini
-            response = self.model.generate_content(full_prompt)
+            # Reuse the answer to an equivalent standalone question, otherwise ask Gemini
+            answer = None if context else self.cache.get(message)
+            if answer is None:
+                answer = await self.llm.generate(full_prompt, site="chat.generate_response", priority="interactive")
+                if not context:
+                    self.cache.set(message, answer)
+            self.sessions.record_turn(session_id, message, answer)
             
             # Apply highlighting
-            highlighted_response = self.highlight_important_words(response.text)
+            highlighted_response = self.highlight_important_words(answer)
             final_response = self.apply_final_formatting(highlighted_response)
             
             logger.info("Non-streaming response generated successfully")
@@ -346,6 +388,14 @@ Always format your responses with clear structure, headings, and bullet points t
 # Initialize the chat system
 studypal_chat = StudyPalChat()
 
+# Recent /chat/stream streams, so dropped clients can resume with Last-Event-ID
+stream_replays = ReplayStore(
+    ttl_seconds=CHAT_REPLAY_TTL,
+    max_streams=CHAT_REPLAY_MAX_STREAMS,
+    max_events=CHAT_REPLAY_MAX_EVENTS,
+    grace_seconds=CHAT_RESUME_GRACE
+)
+
 # ----------------------------
 # FastAPI Endpoints
 # ----------------------------
@@ -363,12 +413,15 @@ async def health():
     return {
         "status": "healthy",
         "service": "StudyPal Chat API",
-        "model": "gemini-1.5-flash",
+        "model": llm.model_name,
         "features": {
             "streaming": True,
             "word_highlighting": True,
             "real_time_processing": True
-        }
+        },
+        "cache": studypal_chat.cache.stats(),
+        "sessions": studypal_chat.sessions.stats(),
+        "llm": llm.stats()
     }
 
 @app.post("/chat", response_model=ChatResponse)
@@ -380,16 +433,19 @@ async def chat(chat_message: ChatMessage):
         
         logger.info(f"Processing chat message: {chat_message.message[:50]}...")
         
+        # A client without a session gets its own, never one shared with other clients
+        session_id = chat_message.session_id or uuid.uuid4().hex
+        
         # Generate response
-        response = studypal_chat.generate_response(
+        response = await studypal_chat.generate_response(
             chat_message.message,
-            chat_message.session_id
+            session_id
         )
         
         return ChatResponse(
             response=response,
             status="success",
-            session_id=chat_message.session_id or "default"
+            session_id=session_id
         )
     
     except Exception as e:
@@ -397,41 +453,64 @@ async def chat(chat_message: ChatMessage):
         raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
 
 @app.post("/chat/stream")
-async def chat_stream(chat_message: ChatMessage):
-    """Streaming chat endpoint with word highlighting"""
+async def chat_stream(chat_message: ChatMessage, request: Request):
+    """Streaming chat endpoint with word highlighting
+    
+    Every event has an id of the form "<stream_id>:<seq>". A client that loses the
+    connection can send the same request again with a Last-Event-ID header to resume
+    from that event without generating the answer again.
+    """
     try:
-        if not chat_message.message.strip():
-            raise HTTPException(status_code=400, detail="Message cannot be empty")
+        last_event_id = request.headers.get("last-event-id")
+        if last_event_id:
+            stream_id, after_seq = parse_event_id(last_event_id)
+            replay = stream_replays.get(stream_id) if stream_id else None
+            if replay is None or not replay.can_resume(after_seq):
+                metrics.increment("chat.stream.resume_misses")
+                raise HTTPException(
+                    status_code=410,
+                    detail="Stream can no longer be resumed; send the question again without Last-Event-ID"
+                )
+            metrics.increment("chat.stream.resumed")
+            logger.info(f"Resuming stream {stream_id} after event {after_seq}")
+        else:
+            if not chat_message.message.strip():
+                raise HTTPException(status_code=400, detail="Message cannot be empty")
+            
+            logger.info(f"Processing streaming chat: {chat_message.message[:50]}...")
+            stream_id, after_seq = uuid.uuid4().hex, 0
         
-        logger.info(f"Processing streaming chat: {chat_message.message[:50]}...")
+        # A client without a session gets its own, never one shared with other clients
+        session_id = chat_message.session_id or uuid.uuid4().hex
         
         async def generate_stream():
+            answered = False
+            
+            metrics.increment("chat.stream.started")
             try:
-                # Send initial session info
-                session_data = {
+                # Send initial session info; later events carry a sequence number instead of a timestamp
+                yield {
                     "type": "session",
-                    "session_id": chat_message.session_id or "default",
+                    "session_id": session_id,
+                    "stream_id": stream_id,
                     "timestamp": datetime.now().isoformat(),
                     "done": False
                 }
-                yield f"data: {json.dumps(session_data)}\n\n"
                 
                 # Stream the response with highlighting
                 async for chunk in studypal_chat.generate_streaming_response(
                     chat_message.message,
-                    chat_message.session_id
+                    session_id,
+                    chat_message.pacing
                 ):
-                    # Add metadata to chunks
-                    chunk_data = {
-                        **chunk,
-                        "done": chunk.get("type") == "complete",
-                        "timestamp": datetime.now().isoformat()
-                    }
+                    if chunk.get("type") == "complete":
+                        answered = True
                     
-                    yield f"data: {json.dumps(chunk_data)}\n\n"
+                    # Add metadata to chunks
+                    yield {**chunk, "done": chunk.get("type") == "complete"}
                     
                     # Add natural delays for better UX
-                    if chunk.get("type") == "content":
+                    if chunk.get("type") == "content" and chat_message.pacing == "typing":
                         # Variable delay based on content
                         content = chunk.get("content", "")
                         if content.endswith('.') or content.endswith('!') or content.endswith('?'):
@@ -442,27 +521,58 @@ async def chat_stream(chat_message: ChatMessage):
                             await asyncio.sleep(0.02)  # Normal typing speed
                 
                 # Send final completion signal
-                final_data = {
+                metrics.increment("chat.stream.completed")
+                yield {
                     "type": "stream_complete",
                     "message": "Stream finished successfully",
                     "done": True,
                     "timestamp": datetime.now().isoformat()
                 }
-                yield f"data: {json.dumps(final_data)}\n\n"
                 
+            except asyncio.CancelledError:
+                # Nobody reconnected within the grace period, so generation was stopped
+                if not answered:
+                    metrics.increment("chat.stream.upstream_cancelled")
+                logger.info(f"Stream {stream_id} abandoned, cancelled streaming response")
+                raise
             except Exception as e:
                 logger.error(f"Error in streaming: {str(e)}")
-                error_data = {
+                yield {
                     "type": "error",
                     "error": str(e),
                     "message": "An error occurred during streaming",
                     "done": True,
                     "timestamp": datetime.now().isoformat()
                 }
-                yield f"data: {json.dumps(error_data)}\n\n"
         
+        if not last_event_id:
+            # Generation runs in the replay buffer, independent of this connection
+            replay = stream_replays.start(stream_id, generate_stream())
+        
+        async def follow_stream():
+            disconnected = False
+            
+            def record_disconnect():
+                nonlocal disconnected
+                if not disconnected:
+                    disconnected = True
+                    metrics.increment("chat.stream.client_disconnects")
+                    logger.info(f"Client disconnected from stream {stream_id}")
+            
+            try:
+                async for event in stop_on_disconnect(
+                    replay.subscribe(after_seq), request, on_disconnect=record_disconnect
+                ):
+                    yield event
+            except asyncio.CancelledError:
+                # The server cancelled the response because the client went away
+                record_disconnect()
+                raise
+        
+        # Typing pacing spaces events out on purpose, so only batch the faster modes
+        flush_window = 0 if chat_message.pacing == "typing" else CHAT_SSE_FLUSH_WINDOW
         return StreamingResponse(
-            generate_stream(),
+            SSEWriter(stream_id).stream(follow_stream(), flush_window),
             media_type="text/plain",
             headers={
                 "Cache-Control": "no-cache",
@@ -473,22 +583,39 @@ async def chat_stream(chat_message: ChatMessage):
             }
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in streaming chat endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating streaming response: {str(e)}")
 
+@app.delete("/chat/sessions/{session_id}")
+async def clear_session(session_id: str):
+    """Forget the conversation history of a session (e.g. when the student starts a new chat)"""
+    if not studypal_chat.sessions.clear(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"status": "success", "session_id": session_id}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Streaming counters for capacity monitoring"""
+    return {
+        "service": "StudyPal Chat API",
+        "counters": {**metrics.snapshot("chat."), **metrics.snapshot("llm.")}
+    }
+
 @app.get("/test")
 async def test_chat():
     """Test endpoint to verify chat functionality"""
     try:
-        test_response = studypal_chat.generate_response(
+        test_response = await studypal_chat.generate_response(
             "Hello! Please introduce yourself as StudyPal and explain what you can help with."
         )
         
         return {
             "status": "success",
             "message": "StudyPal Chat is working correctly",
-            "model": "gemini-1.5-flash",
+            "model": llm.model_name,
             "features": ["streaming", "word_highlighting", "educational_assistance"],
             "test_response": test_response[:300] + "..." if len(test_response) > 300 else test_response
         }
@@ -506,7 +633,20 @@ async def get_features():
         "streaming": {
             "enabled": True,
             "description": "Real-time response streaming with natural typing effects",
-            "endpoint": "/chat/stream"
+            "endpoint": "/chat/stream",
+            "resumable": "Reconnect with a Last-Event-ID header to continue a dropped stream",
+            "pacing_modes": {
+                "typing": "Server-side typing pauses between lines (default)",
+                "raw": "Each formatted line is sent as soon as it is complete",
+                "coalesced": "One event per model chunk with the lines it completes, no pauses"
+            }
+        },
+        "conversation_memory": {
+            "enabled": True,
+            "description": "Follow-up questions see earlier turns of the same session_id",
+            "max_turns": CHAT_SESSION_TURNS,
+            "token_budget": CHAT_SESSION_TOKEN_BUDGET,
+            "idle_timeout_seconds": CHAT_SESSION_TTL
         },
         "word_highlighting": {
             "enabled": True,
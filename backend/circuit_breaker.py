@@ -0,0 +1,126 @@
+"""
+Circuit breaker for Gemini calls in the StudyPal backend services
+Watches the upstream error rate and latency; while Gemini is failing, calls are refused at
+once so each service can serve its local fallback instead of waiting out a timeout
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+
+
+class CircuitOpenError(Exception):
+    """Gemini is marked unavailable; the call was refused without being sent"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Gemini is temporarily unavailable; retrying in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Open after too many failed or slow calls, close again once a background probe succeeds
+
+    Outcomes of the last ``window_seconds`` are kept. Once at least ``min_calls`` were seen
+    and the share of failures (errors, or answers slower than ``slow_call_seconds``) reaches
+    ``failure_ratio``, the breaker opens and check() raises CircuitOpenError. While open, a
+    task calls ``probe`` every ``open_seconds`` (doubling up to ``max_open_seconds`` while it
+    keeps failing); the first successful probe closes the breaker.
+    """
+
+    def __init__(self, probe, window_seconds: float = 30, min_calls: int = 5, failure_ratio: float = 0.5,
+                 slow_call_seconds: float = 15, open_seconds: float = 10, max_open_seconds: float = 120):
+        self.probe = probe
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.state = CLOSED
+        self._outcomes = deque()  # (finished_at, failed)
+        self._retry_at = 0.0
+        self._backoff = open_seconds
+        self._prober = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_ratio > 0
+
+    def check(self):
+        """Raise CircuitOpenError if calls should not be sent right now"""
+        if self.state == CLOSED:
+            return
+        metrics.increment("llm.breaker.rejected")
+        self._ensure_prober()
+        raise CircuitOpenError(max(0.0, self._retry_at - time.monotonic()))
+
+    def record(self, latency: float, failed: bool = False):
+        """Count the outcome of a call that reached Gemini"""
+        if not self.enabled:
+            return
+        failed = failed or latency >= self.slow_call_seconds
+        now = time.monotonic()
+        with self._lock:
+            self._outcomes.append((now, failed))
+            while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+                self._outcomes.popleft()
+            if self.state != CLOSED or len(self._outcomes) < self.min_calls:
+                return
+            failures = sum(1 for _, bad in self._outcomes if bad)
+            if failures / len(self._outcomes) < self.failure_ratio:
+                return
+            self.state = OPEN
+            self._backoff = self.open_seconds
+            self._retry_at = now + self._backoff
+        metrics.increment("llm.breaker.opened")
+        metrics.set_gauge("llm.breaker.open", 1)
+        logger.warning(f"⚡ Gemini circuit opened: {failures}/{len(self._outcomes)} recent calls failed or were slow")
+        self._ensure_prober()
+
+    def _ensure_prober(self):
+        # The probe runs on whichever event loop noticed the open breaker
+        if self._prober is not None and not self._prober.done():
+            return
+        try:
+            self._prober = asyncio.get_running_loop().create_task(self._probe_until_closed())
+        except RuntimeError:
+            pass  # no loop here (e.g. a worker thread); the next async caller starts it
+
+    async def _probe_until_closed(self):
+        while self.state == OPEN:
+            await asyncio.sleep(max(0.0, self._retry_at - time.monotonic()))
+            metrics.increment("llm.breaker.probes")
+            try:
+                await self.probe()
+            except Exception as e:
+                self._backoff = min(self._backoff * 2, self.max_open_seconds)
+                self._retry_at = time.monotonic() + self._backoff
+                logger.warning(f"⚡ Gemini probe failed ({e}); next probe in {self._backoff:.0f}s")
+                continue
+            with self._lock:
+                self.state = CLOSED
+                self._outcomes.clear()
+            metrics.increment("llm.breaker.closed")
+            metrics.set_gauge("llm.breaker.open", 0)
+            logger.info("✅ Gemini circuit closed, probe succeeded")
+
+    def stats(self) -> dict:
+        with self._lock:
+            recent = len(self._outcomes)
+            failures = sum(1 for _, bad in self._outcomes if bad)
+        return {
+            "state": self.state,
+            "recent_calls": recent,
+            "recent_failures": failures,
+            "retry_in_seconds": round(max(0.0, self._retry_at - time.monotonic()), 1) if self.state == OPEN else None,
+        }
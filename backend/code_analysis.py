@@ -0,0 +1,650 @@
+"""
+Static analysis of generated code for the StudyPal code generator
+Python is parsed with the ast module; JavaScript, Java, HTML and CSS go through a single-pass
+tokenizer. Results are memoized by language and a hash of the code, so analyzing the same
+program again costs a dictionary lookup
+"""
+
+import ast
+import bisect
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+import metrics
+
+# Analyses kept in memory, least recently used dropped first
+ANALYSIS_CACHE_SIZE = 256
+
+# Cyclomatic complexity (McCabe) above which a single function is worth splitting up
+COMPLEX_FUNCTION = 10
+
+# language -> function(code) -> analysis dict, filled in by @analyzer
+ANALYZERS = {}
+# language -> function(code) -> (offset, message) of the first syntax error or None, filled in by @validator
+VALIDATORS = {}
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def analyzer(*languages):
+    """Register the decorated function(code) -> dict as the analyzer for the given languages"""
+    def register(func):
+        for language in languages:
+            ANALYZERS[language] = func
+        return func
+    return register
+
+
+def validator(*languages):
+    """Register the decorated function(code) -> (offset, message) or None as the syntax check for the given languages"""
+    def register(func):
+        for language in languages:
+            VALIDATORS[language] = func
+        return func
+    return register
+
+
+def complexity_label(code_lines: int, cyclomatic: int) -> str:
+    """Rough size/complexity class used for suggestions: low, medium or high"""
+    if code_lines > 100 or cyclomatic > 20:
+        return "high"
+    if code_lines > 30 or cyclomatic > 10:
+        return "medium"
+    return "low"
+
+
+def _unique(names):
+    return list(dict.fromkeys(names))
+
+
+def _result(engine: str, code_lines: dict, functions=(), classes=(), imports=(), decisions: int = 0,
+            function_complexity=None, **extra) -> dict:
+    return {
+        "functions": _unique(functions),
+        "classes": _unique(classes),
+        "imports": _unique(imports),
+        "cyclomatic_complexity": 1 + decisions,
+        "function_complexity": function_complexity or {},
+        "complexity": complexity_label(code_lines["code"], 1 + decisions),
+        "lines": code_lines,
+        "engine": engine,
+        **extra,
+    }
+
+
+def _copy(info: dict) -> dict:
+    """Copy deep enough that callers can't change a cached analysis"""
+    return {key: list(value) if isinstance(value, list) else dict(value) if isinstance(value, dict) else value
+            for key, value in info.items()}
+
+
+def line_metrics(code: str, comment_spans=()) -> dict:
+    """Total, code, comment-only and blank lines; ``comment_spans`` are (start, end) offsets of comments"""
+    if not code:
+        return {"total": 0, "code": 0, "comment": 0, "blank": 0}
+    lines = code.split("\n")
+    starts = [0]
+    for line in lines[:-1]:
+        starts.append(starts[-1] + len(line) + 1)
+
+    comment = set()
+    for start, end in comment_spans:
+        first = bisect.bisect_right(starts, start) - 1
+        last = bisect.bisect_right(starts, max(start, end - 1)) - 1
+        line_end = starts[last] + len(lines[last])
+        if code[starts[first]:start].strip():
+            first += 1  # code before the comment
+        if code[end:line_end].strip():
+            last -= 1  # code after the comment
+        comment.update(range(first, last + 1))
+
+    blank = sum(1 for number, line in enumerate(lines) if not line.strip() and number not in comment)
+    return {"total": len(lines), "code": len(lines) - blank - len(comment), "comment": len(comment), "blank": blank}
+
+
+def analyze_code(code: str, language: str) -> dict:
+    """Functions, classes, imports, cyclomatic complexity and line counts of a program
+
+    Unknown languages get the C-like tokenizer, which fits most brace languages.
+    """
+    language = (language or "").lower()
+    key = (language, hashlib.sha256(code.encode("utf-8")).digest())
+    with _cache_lock:
+        info = _cache.get(key)
+        if info is not None:
+            _cache.move_to_end(key)
+    if info is not None:
+        metrics.increment("code_analysis.hits")
+        return _copy(info)
+
+    metrics.increment("code_analysis.misses")
+    try:
+        info = ANALYZERS.get(language, analyze_c_like)(code)
+    except Exception as e:
+        print(f"Error analyzing code: {e}")
+        info = _result("lines", line_metrics(code))
+    with _cache_lock:
+        _cache[key] = info
+        while len(_cache) > ANALYSIS_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return _copy(info)
+
+
+# Nodes that add one McCabe decision point each (match/case is Python 3.10+)
+_PYTHON_BRANCHES = frozenset((ast.If, ast.For, ast.AsyncFor, ast.While, ast.IfExp, ast.ExceptHandler,
+                              getattr(ast, "match_case", ast.If)))
+# Nodes with nothing to count below them
+_PYTHON_LEAVES = frozenset(
+    [ast.Name, ast.Constant]
+    + [kind for base in (ast.expr_context, ast.operator, ast.boolop, ast.cmpop, ast.unaryop)
+       for kind in base.__subclasses__()]
+)
+
+
+def _walk_python(tree):
+    """Definitions, imports and decision points of a parsed module, attributed to the innermost function"""
+    functions, classes, imports = [], [], []
+    decisions = 0
+    counts = [0]  # decision points per function in ``functions`` order, after the module's
+    stack = [(tree, "", 0)]  # node, qualified name prefix, index in counts of the innermost function
+    while stack:
+        node, prefix, owner = stack.pop()
+        kind = type(node)
+        if kind is ast.FunctionDef or kind is ast.AsyncFunctionDef:
+            prefix += node.name
+            functions.append(prefix)
+            counts.append(0)
+            owner = len(counts) - 1
+            prefix += "."
+        elif kind is ast.ClassDef:
+            prefix += node.name
+            classes.append(prefix)
+            prefix += "."
+        elif kind is ast.Import:
+            imports.extend(alias.name for alias in node.names)
+            continue
+        elif kind is ast.ImportFrom:
+            imports.append("." * node.level + (node.module or ""))
+            continue
+        elif kind in _PYTHON_BRANCHES:
+            decisions += 1
+            counts[owner] += 1
+        elif kind is ast.BoolOp:
+            decisions += len(node.values) - 1
+            counts[owner] += len(node.values) - 1
+        elif kind is ast.comprehension:
+            decisions += 1 + len(node.ifs)
+            counts[owner] += 1 + len(node.ifs)
+
+        children = []
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if type(value) is list:
+                children.extend(child for child in value if type(child) not in _PYTHON_LEAVES and isinstance(child, ast.AST))
+            elif isinstance(value, ast.AST) and type(value) not in _PYTHON_LEAVES:
+                children.append(value)
+        stack.extend((child, prefix, owner) for child in reversed(children))
+
+    function_complexity = {}
+    for name, count in zip(functions, counts[1:]):
+        function_complexity[name] = 1 + count
+    return functions, classes, imports, decisions, function_complexity
+
+
+_PYTHON_DEF = re.compile(r"^[ \t]*(?:async[ \t]+)?(def|class)[ \t]+(\w+)|^[ \t]*(?:from[ \t]+([\w.]+)|import[ \t]+([\w.]+))", re.M)
+_PYTHON_DECISION = re.compile(r"\b(?:if|elif|for|while|except|and|or)\b")
+
+
+@analyzer("python")
+def analyze_python(code: str) -> dict:
+    comment_spans = [(match.start(), match.end()) for match in re.finditer(r"^[ \t]*#[^\n]*", code, re.M)]
+    lines = line_metrics(code, comment_spans)
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        # Cut off or invalid: a line scan still finds most definitions
+        functions, classes, imports = [], [], []
+        for match in _PYTHON_DEF.finditer(code):
+            if match.group(1):
+                (functions if match.group(1) == "def" else classes).append(match.group(2))
+            else:
+                imports.append(match.group(3) or match.group(4))
+        return _result("lines", lines, functions, classes, imports, len(_PYTHON_DECISION.findall(code)))
+
+    return _result("ast", lines, *_walk_python(tree))
+
+
+_C_TOKEN = re.compile(
+    r"(?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))"
+    r"|(?P<string>\"(?:\\.|[^\"\\\n])*\"?|'(?:\\.|[^'\\\n])*'?|`(?:\\.|[^`\\])*`?)"
+    r"|(?P<word>[A-Za-z_$][\w$]*)"
+    r"|(?P<op>=>|&&|\|\||\?\?|\?\.|[{}()\[\]?;=:,.*])"
+    r"|(?P<slash>/)",
+    re.S,
+)
+# A JavaScript /regex/ literal: body, closing slash and flags; it is skipped like a string
+_C_REGEX_LITERAL = re.compile(r"(?P<string>/(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[A-Za-z]*)")
+# Words after which a "/" starts a regular expression instead of dividing
+_C_REGEX_AFTER_WORDS = frozenset(("return", "typeof", "instanceof", "in", "of", "new", "delete", "void", "throw",
+                                  "case", "do", "else", "yield", "await"))
+_C_DECISION_WORDS = frozenset(("if", "for", "while", "case", "catch"))
+_C_DECISION_OPS = frozenset(("&&", "||", "??", "?"))
+_C_SIGNIFICANT = _C_DECISION_WORDS | _C_DECISION_OPS | frozenset(("function", "import", "require",
+                                                                  "(", ")", "=>", "{", "}", ";"))
+# Words that can come right before "(...) {" without naming a method
+_C_NOT_NAMES = frozenset(("if", "for", "while", "switch", "catch", "function", "synchronized", "with", "return", "new"))
+_C_CLASS_WORDS = {
+    "javascript": frozenset(("class",)),
+    "java": frozenset(("class", "interface", "enum", "record")),
+}
+
+
+def _starts_regex(code: str, start: int, slash: int) -> bool:
+    """Whether the "/" at ``slash`` opens a regex literal, judged by what comes before it"""
+    if slash > start and code[slash - 1] == "<":
+        return False  # a JSX closing tag such as </span>
+    back = slash - 1
+    while back >= start and code[back] in " \t\r\n":
+        back -= 1
+    if back < start:
+        return True
+    char = code[back]
+    if char in ")]\"'`":
+        return False
+    if char.isalnum() or char in "_$":
+        word_end = back + 1
+        while back >= start and (code[back].isalnum() or code[back] in "_$"):
+            back -= 1
+        return code[back + 1:word_end] in _C_REGEX_AFTER_WORDS
+    return True  # after an operator, an opening bracket or a "}"
+
+
+def _scan_c_like(code: str, start: int = 0, end: int = None, regex_literals: bool = True) -> list:
+    """Token matches in code[start:end], with kinds in ``lastgroup``
+
+    With ``regex_literals`` (JavaScript), a "/" where a value is expected opens a regex
+    literal, which comes out as one "string" token; otherwise "/" is an operator.
+    """
+    end = len(code) if end is None else end
+    matches = []
+    append = matches.append
+    position = start
+    while True:
+        # Runs to the end unless a regex literal hides text that would otherwise tokenize
+        for match in _C_TOKEN.finditer(code, position, end):
+            if match.lastgroup == "slash" and regex_literals and _starts_regex(code, start, match.start()):
+                literal = _C_REGEX_LITERAL.match(code, match.start(), end)
+                if literal:
+                    append(literal)
+                    position = literal.end()
+                    break
+            append(match)
+        else:
+            return matches
+
+
+def _tokenize_c_like(code: str, comment_spans: list, regex_literals: bool = True):
+    """Significant tokens as (kind, text); comments are left out and their spans recorded"""
+    matches = _scan_c_like(code, regex_literals=regex_literals)
+    comment_spans.extend(match.span() for match in matches if match.lastgroup == "comment")
+    return [(match.lastgroup, match.group()) for match in matches if match.lastgroup != "comment"]
+
+
+def analyze_c_like(code: str, language: str = "javascript") -> dict:
+    """One pass over JavaScript/Java-style tokens, tracking braces to name nested definitions"""
+    class_words = _C_CLASS_WORDS.get(language, _C_CLASS_WORDS["javascript"])
+    java_imports = language == "java"
+    comment_spans = []
+    tokens = _tokenize_c_like(code, comment_spans, regex_literals=not java_imports)
+
+    functions, classes, imports = [], [], []
+    function_complexity = {}
+    decisions = 0
+    blocks = []  # per open "{": (kind, name) for classes and functions, None for other blocks
+    open_functions = []  # [qualified name, decision points] for each open function body
+    parens = []  # token index of each open "("
+    matching = {}  # token index of ")" -> index of its "("
+    pending = None  # (kind, name) waiting for the "{" of its body
+    expect = None  # "class", "function" or "import": what the next tokens name
+    import_parts = []
+
+    def qualified(name):
+        return ".".join([block[1] for block in blocks if block] + [name])
+
+    # Tokens that do something below when nothing is expected; most identifiers and
+    # punctuation are only looked back at, so they are skipped straight away
+    significant = class_words | _C_SIGNIFICANT
+    for index, (kind, text) in enumerate(tokens):
+        if expect is None and text not in significant:
+            continue
+        if expect == "import":
+            if java_imports:
+                if text == ";":
+                    imports.append("".join(import_parts))
+                    expect = None
+                elif not (text == "static" and not import_parts):
+                    import_parts.append(text)
+                continue
+            if kind == "string":
+                imports.append(text[1:-1])
+                expect = None
+            elif text == ";":
+                expect = None
+            continue
+        if kind == "string":
+            expect = None
+            continue
+
+        if kind == "word":
+            if expect == "class":
+                pending = ("class", text)
+                classes.append(qualified(text))
+                expect = None
+            elif expect == "function":
+                pending = ("function", text)
+                expect = None
+            elif text in class_words and (index == 0 or tokens[index - 1][1] != "."):
+                expect = "class"
+            elif text == "function":
+                expect = "function"
+            elif text == "import" or (text == "require" and not java_imports):
+                if text == "import" or (index + 1 < len(tokens) and tokens[index + 1][1] == "("):
+                    expect = "import"
+                    import_parts = []
+            elif text in _C_DECISION_WORDS:
+                decisions += 1
+                if open_functions:
+                    open_functions[-1][1] += 1
+            continue
+
+        if expect == "class":
+            expect = None  # anonymous class expression
+        if text in _C_DECISION_OPS:
+            decisions += 1
+            if open_functions:
+                open_functions[-1][1] += 1
+        elif text == "(":
+            if expect == "function":
+                # Anonymous function expression: take the name it is assigned to
+                if index >= 3 and tokens[index - 2][1] in ("=", ":") and tokens[index - 3][0] == "word":
+                    pending = ("function", tokens[index - 3][1])
+                else:
+                    pending = ("function", None)
+                expect = None
+            parens.append(index)
+        elif text == ")":
+            if parens:
+                matching[index] = parens.pop()
+        elif text == "=>":
+            start = matching.get(index - 1, index - 1)  # "(a, b) =>" or "a =>"
+            if start > 0 and tokens[start - 1][1] == "async":
+                start -= 1
+            name = None
+            if start >= 2 and tokens[start - 1][1] in ("=", ":") and tokens[start - 2][0] == "word":
+                name = tokens[start - 2][1]
+            if index + 1 < len(tokens) and tokens[index + 1][1] == "{":
+                pending = ("function", name)
+            elif name:
+                functions.append(qualified(name))
+                function_complexity[qualified(name)] = 1
+        elif text == "{":
+            block = None
+            if pending:
+                block = pending
+                pending = None
+            else:
+                # "name(...) {", possibly with a Java throws clause before the brace
+                back = index - 1
+                while back > 0 and tokens[back][1] != ")" and (tokens[back][0] == "word" or tokens[back][1] in ",."):
+                    back -= 1
+                if back in matching:
+                    open_index = matching[back]
+                    name_kind, name = tokens[open_index - 1] if open_index > 0 else ("op", "")
+                    before = tokens[open_index - 2][1] if open_index > 1 else ""
+                    if name_kind == "word" and name not in _C_NOT_NAMES and before not in (".", "new"):
+                        block = ("function", name)
+            if block and block[0] == "function":
+                if block[1] is None:
+                    block = None  # anonymous: its decisions count towards the enclosing function
+                else:
+                    functions.append(qualified(block[1]))
+                    open_functions.append([qualified(block[1]), 0])
+            blocks.append(block)
+        elif text == "}":
+            if blocks:
+                block = blocks.pop()
+                if block and block[0] == "function" and open_functions:
+                    name, count = open_functions.pop()
+                    function_complexity[name] = 1 + count
+        elif text == ";":
+            pending = None
+
+    while open_functions:  # cut off before the closing braces
+        name, count = open_functions.pop()
+        function_complexity[name] = 1 + count
+    return _result("tokenizer", line_metrics(code, comment_spans), functions, classes, imports, decisions,
+                   function_complexity)
+
+
+@analyzer("javascript", "js", "typescript", "ts", "jsx", "tsx")
+def analyze_javascript(code: str) -> dict:
+    return analyze_c_like(code, "javascript")
+
+
+@analyzer("java")
+def analyze_java(code: str) -> dict:
+    return analyze_c_like(code, "java")
+
+
+_CSS_TOKEN = re.compile(r"(?P<comment>/\*.*?(?:\*/|\Z))|(?P<string>\"(?:\\.|[^\"\\])*\"?|'(?:\\.|[^'\\])*'?)|(?P<end>[{};])", re.S)
+_CSS_CLASS = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+_CSS_IMPORT = re.compile(r"@(?:import|use|forward)\s+(?:url\()?\s*[\"']?([^\"')\s;]+)")
+_CSS_DEFINITION = re.compile(r"@(?:mixin|function)\s+([\w-]+)")
+_CSS_DECISION = re.compile(r"@(?:if|else if|each|for|while)\b")
+
+
+@analyzer("css", "scss", "sass", "less")
+def analyze_css(code: str) -> dict:
+    """Class selectors, @import targets and SCSS mixins/functions, from the text before each { ; }"""
+    comment_spans = []
+    classes, imports, functions = [], [], []
+    decisions = 0
+    prelude = []
+    position = 0
+    for match in _CSS_TOKEN.finditer(code):
+        kind = match.lastgroup
+        prelude.append(code[position:match.start()])
+        position = match.end()
+        if kind == "comment":
+            comment_spans.append(match.span())
+        elif kind == "string":
+            prelude.append(match.group())
+        else:
+            text = "".join(prelude)
+            prelude = []
+            if "@" in text:
+                imports += _CSS_IMPORT.findall(text)
+                functions += _CSS_DEFINITION.findall(text)
+                decisions += len(_CSS_DECISION.findall(text))
+            if match.group() == "{" and not text.lstrip().startswith("@"):
+                # A selector; drop quoted attribute values before looking for .class names
+                classes += _CSS_CLASS.findall(re.sub(r"\"[^\"]*\"|'[^']*'|\[[^\]]*\]", "", text))
+    return _result("tokenizer", line_metrics(code, comment_spans), functions, classes, imports, decisions)
+
+
+_HTML_TOKEN = re.compile(
+    r"(?P<comment><!--.*?(?:-->|\Z))"
+    r"|<(?P<raw>script|style)\b(?P<raw_attrs>[^>]*)>(?P<body>.*?)(?:</(?P=raw)\s*>|\Z)"
+    r"|<(?P<tag>[A-Za-z][\w-]*)(?P<attrs>[^>]*)>",
+    re.S | re.I,
+)
+_HTML_IMPORT = re.compile(r"\b(?:src|href)\s*=\s*[\"']?([^\"'\s>]+)", re.I)
+
+
+@analyzer("html", "htm")
+def analyze_html(code: str) -> dict:
+    """Linked scripts and stylesheets, plus whatever the inline <script> and <style> blocks define"""
+    comment_spans = []
+    functions, classes, imports = [], [], []
+    function_complexity = {}
+    decisions = 0
+    elements = 0
+    for match in _HTML_TOKEN.finditer(code):
+        if match.lastgroup == "comment":
+            comment_spans.append(match.span())
+            continue
+        elements += 1
+        attrs = match.group("raw_attrs") if match.group("raw") else match.group("attrs")
+        tag = (match.group("raw") or match.group("tag")).lower()
+        if tag in ("script", "link"):
+            imports += _HTML_IMPORT.findall(attrs or "")
+        body = match.group("body")
+        if body and body.strip():
+            inner = analyze_css(body) if tag == "style" else analyze_javascript(body)
+            functions += inner["functions"]
+            classes += inner["classes"]
+            imports += inner["imports"]
+            function_complexity.update(inner["function_complexity"])
+            decisions += inner["cyclomatic_complexity"] - 1
+    return _result("tokenizer", line_metrics(code, comment_spans), functions, classes, imports, decisions,
+                   function_complexity, elements=elements)
+
+
+def check_syntax(code: str, language: str):
+    """First syntax error in a program as {"line", "column", "message"}, or None if none was found
+
+    Python is compiled; other languages get bracket and structure checks, which catch the
+    usual damage (a cut-off answer, an unbalanced edit) but not every error. Languages
+    without a check always pass.
+    """
+    check = VALIDATORS.get((language or "").lower())
+    if check is None:
+        return None
+    error = check(code)
+    if error is None:
+        return None
+    if isinstance(error, dict):
+        return error
+    offset, message = error
+    line = code.count("\n", 0, offset) + 1
+    return {"line": line, "column": offset - (code.rfind("\n", 0, offset) + 1) + 1, "message": message}
+
+
+@validator("python")
+def check_python(code: str):
+    try:
+        compile(code, "<generated>", "exec", dont_inherit=True)
+    except SyntaxError as e:
+        return {"line": e.lineno or 1, "column": e.offset or 1, "message": e.msg}
+    except ValueError as e:  # e.g. null bytes
+        return {"line": 1, "column": 1, "message": str(e)}
+    return None
+
+
+_CLOSERS = {")": "(", "]": "[", "}": "{"}
+
+
+def _line_of(code: str, offset: int) -> int:
+    return code.count("\n", 0, offset) + 1
+
+
+def _check_brackets(code: str, matches, end: int = None):
+    """Bracket balance over a tokenizer's matches in ``code`` up to ``end``, skipping strings and comments"""
+    end = len(code) if end is None else end
+    stack = []
+    for match in matches:
+        kind = match.lastgroup
+        text = match.group()
+        offset = match.start()
+        if kind == "comment":
+            if text.startswith("/*") and (len(text) < 4 or not text.endswith("*/")):
+                return offset, "Unterminated /* comment"
+        elif kind in ("op", "end") and text in "([{":
+            stack.append((text, offset))
+        elif kind in ("op", "end") and text in _CLOSERS:
+            if not stack:
+                return offset, f"Unmatched '{text}'"
+            opener, opened_at = stack.pop()
+            if opener != _CLOSERS[text]:
+                return offset, f"'{text}' does not match '{opener}' opened on line {_line_of(code, opened_at)}"
+    if stack:
+        opener, opened_at = stack[-1]
+        return end, f"'{opener}' opened on line {_line_of(code, opened_at)} is never closed"
+    return None
+
+
+@validator("javascript", "js", "typescript", "ts", "jsx", "tsx")
+def check_c_like(code: str):
+    return _check_brackets(code, _scan_c_like(code))
+
+
+@validator("java")
+def check_java(code: str):
+    return _check_brackets(code, _scan_c_like(code, regex_literals=False))
+
+
+@validator("css", "scss", "sass", "less")
+def check_css(code: str):
+    return _check_brackets(code, _CSS_TOKEN.finditer(code))
+
+
+# Elements that never have a closing tag, and ones whose closing tag may be left out
+_HTML_VOID = frozenset(("area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param",
+                        "source", "track", "wbr"))
+_HTML_OPTIONAL_END = frozenset(("html", "head", "body", "p", "li", "dt", "dd", "option", "optgroup", "tr", "td",
+                                "th", "thead", "tbody", "tfoot", "colgroup", "caption", "rt", "rp"))
+_HTML_STRUCTURE = re.compile(
+    r"(?P<comment><!--.*?(?:-->|\Z))"
+    r"|<(?P<raw>script|style)\b[^>]*>(?P<body>.*?)(?P<raw_end></(?P=raw)\s*>|\Z)"
+    r"|<(?P<close>/?)(?P<tag>[A-Za-z][\w-]*)(?:\"[^\"]*\"|'[^']*'|[^'\">])*?(?P<self>/?)(?P<gt>>|\Z)"
+    r"|<!(?P<declaration>[^>]*)>",
+    re.S | re.I,
+)
+
+
+@validator("html", "htm")
+def check_html(code: str):
+    """Unclosed or mismatched tags, plus the brackets of inline scripts and styles"""
+    stack = []
+    for match in _HTML_STRUCTURE.finditer(code):
+        if match.group("comment") is not None:
+            if not match.group("comment").endswith("-->"):
+                return match.start(), "Unterminated <!-- comment"
+        elif match.group("raw"):
+            if not match.group("raw_end"):
+                return match.start(), f"<{match.group('raw')}> is never closed"
+            start, end = match.span("body")
+            if match.group("raw").lower() == "style":
+                tokens = _CSS_TOKEN.finditer(code, start, end)
+            else:
+                tokens = _scan_c_like(code, start, end)
+            error = _check_brackets(code, tokens, end)
+            if error:
+                return error
+        elif match.group("tag"):
+            tag = match.group("tag").lower()
+            if not match.group("gt"):
+                return match.start(), f"<{tag}> tag is never closed with '>'"
+            if not match.group("close"):
+                if tag not in _HTML_VOID and not match.group("self"):
+                    stack.append((tag, match.start()))
+                continue
+            if tag in _HTML_VOID:
+                continue
+            if not any(name == tag for name, _ in stack):
+                if tag in _HTML_OPTIONAL_END:
+                    continue
+                return match.start(), f"Unexpected </{tag}>"
+            while stack:
+                name, opened_at = stack.pop()
+                if name == tag:
+                    break
+                if name not in _HTML_OPTIONAL_END:
+                    return match.start(), f"<{name}> opened on line {_line_of(code, opened_at)} is not closed before </{tag}>"
+    for name, opened_at in reversed(stack):
+        if name not in _HTML_OPTIONAL_END:
+            return len(code), f"<{name}> opened on line {_line_of(code, opened_at)} is never closed"
+    return None
@@ -1,12 +1,19 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-import google.generativeai as genai
 import os
 import json
+import asyncio
 import uvicorn
 import re
 from dotenv import load_dotenv
+from llm_client import get_client, deadline
+import metrics
+from code_analysis import analyze_code, check_syntax, COMPLEX_FUNCTION
+from scheduler import INTERACTIVE, BULK
+from sse import SSEWriter
+from streaming import stop_on_disconnect
 from typing import Optional, List
 
 # Load environment variables
@@ -29,8 +36,19 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     raise ValueError("Please set GEMINI_API_KEY in your .env file")
 
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-1.5-flash')
+# Shared Gemini client: async calls with timeouts and a process-wide concurrency cap
+llm = get_client(GEMINI_API_KEY)
+
+# Seconds a /generate request may spend on Gemini calls in total
+CODE_GENERATION_DEADLINE = float(os.getenv("CODE_GENERATION_DEADLINE", "45"))
+# Characters of generated code the explanation prompt sees; the explanation call starts as
+# soon as this much code has streamed in, overlapping the rest of the code generation
+EXPLANATION_CODE_CHARS = 500
+# Lines either side of a syntax error sent in the repair prompt
+REPAIR_CONTEXT_LINES = int(os.getenv("CODE_REPAIR_CONTEXT_LINES", "3"))
+# Generations one /generate/batch request runs at a time, and the most requests it accepts
+CODE_BATCH_CONCURRENCY = int(os.getenv("CODE_BATCH_CONCURRENCY", "4"))
+CODE_BATCH_MAX_ITEMS = int(os.getenv("CODE_BATCH_MAX_ITEMS", "100"))
 
 # Request/Response Models
 class CodeRequest(BaseModel):
@@ -47,6 +65,7 @@ class CodeResponse(BaseModel):
     language: str
     explanation: str
     suggestions: List[str]
+    validation: Optional[dict] = None
     error: Optional[str] = None
 
 # Pre-defined prompts for different programming languages and frameworks
@@ -100,6 +119,16 @@ async def root():
 async def health():
     return {"status": "healthy", "service": "Code Generator API"}
 
+@app.get("/metrics")
+async def get_metrics():
+    """Syntax check counters; every repaired answer is an /improve round trip the user did not need"""
+    counters = metrics.snapshot("code_generator.")
+    return {
+        "service": "Code Generator API",
+        "retries_saved": counters.get("code_generator.syntax.repaired", 0),
+        "counters": {**counters, **metrics.snapshot("code_analysis."), **metrics.snapshot("llm.")}
+    }
+
 @app.get("/languages")
 async def get_supported_languages():
     """Get list of supported programming languages and frameworks"""
@@ -154,60 +183,8 @@ def create_prompt(request: CodeRequest) -> str:
     return base_prompt
 
 def extract_code_info(code: str, language: str) -> dict:
-    """Extract information about the generated code"""
-    
-    info = {
-        "functions": [],
-        "classes": [],
-        "imports": [],
-        "complexity": "medium"
-    }
-    
-    lines = code.split('\n')
-    
-    try:
-        if language.lower() == "python":
-            for line in lines:
-                line = line.strip()
-                if line.startswith('def '):
-                    func_name = re.search(r'def\s+(\w+)', line)
-                    if func_name:
-                        info["functions"].append(func_name.group(1))
-                elif line.startswith('class '):
-                    class_name = re.search(r'class\s+(\w+)', line)
-                    if class_name:
-                        info["classes"].append(class_name.group(1))
-                elif line.startswith('import ') or line.startswith('from '):
-                    info["imports"].append(line)
-                    
-        elif language.lower() == "javascript":
-            for line in lines:
-                line = line.strip()
-                if 'function ' in line or '=>' in line:
-                    func_match = re.search(r'(?:function\s+(\w+)|const\s+(\w+)\s*=)', line)
-                    if func_match:
-                        func_name = func_match.group(1) or func_match.group(2)
-                        if func_name:
-                            info["functions"].append(func_name)
-                elif 'class ' in line:
-                    class_match = re.search(r'class\s+(\w+)', line)
-                    if class_match:
-                        info["classes"].append(class_match.group(1))
-                elif 'import ' in line or 'require(' in line:
-                    info["imports"].append(line)
-        
-        # Determine complexity based on code length and features
-        if len(lines) > 100:
-            info["complexity"] = "high"
-        elif len(lines) > 30:
-            info["complexity"] = "medium"
-        else:
-            info["complexity"] = "low"
-            
-    except Exception as e:
-        print(f"Error analyzing code: {e}")
-    
-    return info
+    """Extract information about the generated code: functions, classes, imports, complexity and line counts"""
+    return analyze_code(code, language)
 
 def generate_suggestions(requirement: str, language: str, code_info: dict) -> List[str]:
     """Generate helpful suggestions based on the generated code"""
@@ -229,8 +206,12 @@ def generate_suggestions(requirement: str, language: str, code_info: dict) -> Li
         ])
     
     # Suggestions based on complexity
+    complex_functions = [name for name, score in code_info["function_complexity"].items() if score > COMPLEX_FUNCTION]
+    if complex_functions:
+        suggestions.append(f"Consider breaking down complex functions into smaller ones (e.g. {complex_functions[0]})")
     if code_info["complexity"] == "high":
-        suggestions.append("Consider breaking down complex functions into smaller ones")
+        if not complex_functions:
+            suggestions.append("Consider breaking down complex functions into smaller ones")
         suggestions.append("Add comprehensive error handling and logging")
     
     # Suggestions based on detected features
@@ -242,9 +223,215 @@ def generate_suggestions(requirement: str, language: str, code_info: dict) -> Li
     
     return suggestions[:4]  # Limit to 4 suggestions
 
-@app.post("/generate", response_model=CodeResponse)
-async def generate_code(request: CodeRequest):
-    """Generate code based on user requirements"""
+def strip_code_fences(answer: str) -> str:
+    """The code from a model answer, without the markdown code block around it"""
+    code = answer.strip()
+    if "```" in code:
+        # Extract code from markdown code blocks
+        code_match = re.search(r'```(?:\w+)?\n?(.*?)\n?```', code, re.DOTALL)
+        if code_match:
+            code = code_match.group(1).strip()
+    return code
+
+def settled_code_prefix(partial_answer: str, size: int = EXPLANATION_CODE_CHARS) -> Optional[str]:
+    """First ``size`` characters of the code in a still-streaming answer, or None until they are known
+
+    Matches what strip_code_fences() will return for the whole answer, unless a fence only
+    shows up later; generate_code checks the guess once the stream ends.
+    """
+    text = partial_answer.lstrip()
+    fence = text.find("```")
+    if fence != -1:
+        text = text[fence:]
+        text = text[re.match(r'```(?:\w+)?\n?', text).end():].lstrip()
+    if len(text) < size + 3 or "```" in text[:size + 2]:
+        return None  # the code may still end (or its closing fence begin) within the first size characters
+    return text[:size]
+
+async def explain_code_start(code_start: str, language: str, priority: str = INTERACTIVE) -> str:
+    """Short explanation of a piece of generated code, based on its first EXPLANATION_CODE_CHARS characters"""
+    explanation_prompt = f"""
+        Briefly explain what this {language} code does in 2-3 sentences:
+        
+        {code_start}...
+        
+        Focus on the main purpose and key features.
+        """
+    return (await llm.generate(explanation_prompt, site="code_generator.explanation", priority=priority)).strip()
+
+def replacement_lines(answer: str) -> List[str]:
+    """The lines of a repair answer, without a code block around them but with their indentation"""
+    if "```" in answer:
+        code_match = re.search(r'```(?:\w+)?\n?(.*?)\n?```', answer, re.DOTALL)
+        if code_match:
+            answer = code_match.group(1)
+    return answer.strip("\n").rstrip().split("\n")
+
+async def validate_and_repair(code: str, language: str, priority: str = INTERACTIVE):
+    """Check the syntax of generated code and, if it is broken, have Gemini fix just the broken lines
+
+    Sends only the lines around the error, splices the answer back in and keeps it if the
+    result passes the check; otherwise the original code is returned. Returns (code, validation).
+    """
+    metrics.increment("code_generator.syntax.checked")
+    error = await asyncio.to_thread(check_syntax, code, language)
+    if error is None:
+        return code, {"valid": True, "repaired": False}
+
+    metrics.increment("code_generator.syntax.invalid")
+    print(f"🔧 Syntax error on line {error['line']}: {error['message']}; asking for a targeted fix")
+    lines = code.split("\n")
+    start = max(1, min(error["line"], len(lines)) - REPAIR_CONTEXT_LINES)
+    end = min(len(lines), error["line"] + REPAIR_CONTEXT_LINES)
+    # Blank lines at the edges would only get lost in the answer
+    while start < end and not lines[start - 1].strip():
+        start += 1
+    while end > start and not lines[end - 1].strip():
+        end -= 1
+    span = "\n".join(lines[start - 1:end])
+    repair_prompt = (
+        f"This {language} code has a syntax error on line {error['line']}: {error['message']}\n\n"
+        f"Lines {start}-{end} of the code:\n```{language}\n{span}\n```\n\n"
+        f"Reply with only the corrected lines {start}-{end}, keeping their indentation. Change as little as "
+        "possible; add lines only if something is missing (e.g. closing brackets). No explanations."
+    )
+    try:
+        answer = await llm.generate(repair_prompt, site="code_generator.repair", priority=priority)
+        repaired = "\n".join(lines[:start - 1] + replacement_lines(answer) + lines[end:])
+        remaining = await asyncio.to_thread(check_syntax, repaired, language)
+    except Exception as e:
+        print(f"⚠️ Syntax repair failed: {str(e)}")
+        remaining = error
+    if remaining is not None:
+        metrics.increment("code_generator.syntax.repair_failed")
+        return code, {"valid": False, "repaired": False, "error": error}
+
+    metrics.increment("code_generator.syntax.repaired")
+    print(f"✅ Repaired lines {start}-{end}")
+    return repaired, {"valid": True, "repaired": True, "error": error}
+
+class CodeFenceStripper:
+    """Remove the markdown code block around a streaming answer, one chunk at a time
+
+    feed() returns the code that can be shown so far; trailing whitespace and backticks are
+    held back until it is clear they are not the closing fence, and finish() returns the rest.
+    The pieces join up to strip_code_fences() of the whole answer, except when the model
+    writes prose before a code block; /generate/stream's final event has the exact code.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._in_code = False
+        self._started = False  # some code was returned, so leading whitespace is kept
+        self.done = False  # the closing fence arrived; anything after it is ignored
+
+    def feed(self, chunk: str) -> str:
+        if self.done:
+            return ""
+        self._pending += chunk
+        if not self._in_code:
+            text = self._pending.lstrip()
+            if "```".startswith(text):
+                self._pending = text  # nothing yet, or maybe the start of an opening fence
+                return ""
+            if text.startswith("```"):
+                opening = re.match(r'```\w*', text)
+                if opening.end() == len(text):
+                    self._pending = text  # the language tag may continue
+                    return ""
+                text = text[opening.end():]
+                if text.startswith("\n"):
+                    text = text[1:]
+            self._pending = text
+            self._in_code = True
+
+        text = self._pending if self._started else self._pending.lstrip()
+        closing = text.find("```")
+        if closing != -1:
+            self.done = True
+            self._pending = ""
+            return text[:closing].rstrip()
+        settled = len(text.rstrip(" \t\r\n`"))
+        self._pending = text[settled:]
+        if settled:
+            self._started = True
+        return text[:settled]
+
+    def finish(self) -> str:
+        """Code held back at the end of the stream"""
+        if self.done:
+            return ""
+        self.done = True
+        return self._pending.strip()
+
+async def run_code_generation(request: CodeRequest, on_code=None, priority: str = INTERACTIVE) -> dict:
+    """Generate, analyze and explain code for a request
+
+    ``on_code`` is called with each piece of code (markdown fences removed) as it streams in.
+    ``priority`` is the scheduling class of the Gemini calls ("bulk" for batch jobs).
+    Returns the final code with its explanation, analysis and suggestions; errors propagate.
+    """
+    # Create prompt
+    prompt = create_prompt(request)
+    print(f"📝 Created prompt for {request.language} code generation")
+
+    # Stream the code from Gemini and explain its start while the rest is still being written;
+    # the code and explanation calls share one end-to-end deadline
+    with deadline(CODE_GENERATION_DEADLINE):
+        print("🤖 Sending request to Gemini AI...")
+        answer = ""
+        stripper = CodeFenceStripper()
+        explaining = None  # (code the explanation was asked about, its task)
+        try:
+            async for chunk in llm.stream(prompt, site="code_generator.generate_code", priority=priority, hedge=True):
+                answer += chunk
+                code = stripper.feed(chunk)
+                if code and on_code:
+                    on_code(code)
+                if explaining is None:
+                    code_start = settled_code_prefix(answer)
+                    if code_start is not None:
+                        explaining = (code_start, asyncio.create_task(explain_code_start(code_start, request.language, priority)))
+            code = stripper.finish()
+            if code and on_code:
+                on_code(code)
+
+            # Clean up the code (remove markdown formatting if present)
+            generated_code = strip_code_fences(answer)
+            print(f"✅ Generated {len(generated_code)} characters of code")
+
+            # Fix a syntax error with one targeted call here rather than a full /improve round trip later
+            generated_code, validation = await validate_and_repair(generated_code, request.language, priority)
+
+            # Analyze the generated code (off the event loop: large files take tens of milliseconds)
+            code_info = await asyncio.to_thread(extract_code_info, generated_code, request.language)
+
+            # Short code, or the early guess was wrong (e.g. prose before a late fence): explain the final code
+            code_start = generated_code[:EXPLANATION_CODE_CHARS]
+            if explaining is None or explaining[0] != code_start:
+                if explaining is not None:
+                    explaining[1].cancel()
+                    metrics.increment("code_generator.explanation_restarts")
+                explaining = (code_start, asyncio.create_task(explain_code_start(code_start, request.language, priority)))
+            explanation = await explaining[1]
+        finally:
+            if explaining is not None and not explaining[1].done():
+                explaining[1].cancel()
+
+    # Generate suggestions
+    suggestions = generate_suggestions(request.requirement, request.language, code_info)
+
+    return {
+        "generated_code": generated_code,
+        "language": request.language,
+        "explanation": explanation,
+        "code_info": code_info,
+        "suggestions": suggestions,
+        "validation": validation,
+    }
+
+async def generate_code_response(request: CodeRequest, priority: str = INTERACTIVE) -> CodeResponse:
+    """Run one code generation request; failures become an unsuccessful CodeResponse"""
     try:
         print(f"🚀 Generating code for: {request.requirement[:50]}...")
         
@@ -252,48 +439,15 @@ async def generate_code(request: CodeRequest):
         if not request.requirement.strip():
             raise HTTPException(status_code=400, detail="Requirement cannot be empty")
         
-        # Create prompt
-        prompt = create_prompt(request)
-        print(f"📝 Created prompt for {request.language} code generation")
-        
-        # Generate code using Gemini
-        print("🤖 Sending request to Gemini AI...")
-        response = model.generate_content(prompt)
-        generated_code = response.text.strip()
-        
-        # Clean up the code (remove markdown formatting if present)
-        if "```" in generated_code:
-            # Extract code from markdown code blocks
-            code_match = re.search(r'```(?:\w+)?\n?(.*?)\n?```', generated_code, re.DOTALL)
-            if code_match:
-                generated_code = code_match.group(1).strip()
-        
-        print(f"✅ Generated {len(generated_code)} characters of code")
-        
-        # Analyze the generated code
-        code_info = extract_code_info(generated_code, request.language)
-        
-        # Generate explanation
-        explanation_prompt = f"""
-        Briefly explain what this {request.language} code does in 2-3 sentences:
-        
-        {generated_code[:500]}...
-        
-        Focus on the main purpose and key features.
-        """
-        
-        explanation_response = model.generate_content(explanation_prompt)
-        explanation = explanation_response.text.strip()
-        
-        # Generate suggestions
-        suggestions = generate_suggestions(request.requirement, request.language, code_info)
+        result = await run_code_generation(request, priority=priority)
         
         return CodeResponse(
             success=True,
-            generated_code=generated_code,
+            generated_code=result["generated_code"],
             language=request.language,
-            explanation=explanation,
-            suggestions=suggestions
+            explanation=result["explanation"],
+            suggestions=result["suggestions"],
+            validation=result["validation"]
         )
         
     except Exception as e:
@@ -307,6 +461,124 @@ async def generate_code(request: CodeRequest):
             error=str(e)
         )
 
+@app.post("/generate", response_model=CodeResponse)
+async def generate_code(request: CodeRequest):
+    """Generate code based on user requirements"""
+    return await generate_code_response(request)
+
+@app.post("/generate/stream")
+async def generate_code_stream(request: CodeRequest, http_request: Request):
+    """Generate code as server-sent events, so the editor can show it as it is written
+
+    Events: "code" with the next piece of code (markdown fences already removed), then
+    "complete" with the final generated_code, explanation, code_info, suggestions and syntax
+    validation, or "error". The complete event's generated_code is authoritative (it may have
+    been repaired after streaming).
+    """
+    if not request.requirement.strip():
+        raise HTTPException(status_code=400, detail="Requirement cannot be empty")
+    print(f"🚀 Streaming code for: {request.requirement[:50]}...")
+
+    async def events():
+        # The generation runs in one task of its own, so its deadline() spans every event
+        queue = asyncio.Queue()
+
+        async def produce():
+            try:
+                result = await run_code_generation(
+                    request, on_code=lambda code: queue.put_nowait({"type": "code", "content": code})
+                )
+                queue.put_nowait({"type": "complete", **result})
+            except Exception as e:
+                print(f"❌ Error streaming code: {str(e)}")
+                queue.put_nowait({"type": "error", "error": str(e)})
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                event = await queue.get()
+                yield {**event, "done": event["type"] != "code"}
+                if event["type"] != "code":
+                    return
+        finally:
+            # The client went away: stop the Gemini stream and the explanation call
+            producer.cancel()
+
+    return StreamingResponse(
+        SSEWriter().stream(stop_on_disconnect(events(), http_request)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
+    )
+
+def batch_key(request: CodeRequest) -> str:
+    """Requests with the same key would get the same prompt (whitespace in the requirement is ignored)"""
+    return json.dumps({**request.model_dump(), "requirement": " ".join(request.requirement.split())}, sort_keys=True)
+
+@app.post("/generate/batch")
+async def generate_code_batch(requests: List[CodeRequest], http_request: Request):
+    """Generate code for a list of requests, streaming each result as a server-sent event when it is done
+
+    At most CODE_BATCH_CONCURRENCY generations run at once, as bulk work so students using
+    /generate keep priority. Identical requests are generated once. Events: "result" for each
+    item, with its ``index`` in the list, ``duplicate_of`` (the index it was generated for, if
+    it was a repeat) and the /generate response fields; a failed item has success false and
+    an error. A "complete" event with the totals comes last.
+    """
+    if not requests:
+        raise HTTPException(status_code=400, detail="At least one request is required")
+    if len(requests) > CODE_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {CODE_BATCH_MAX_ITEMS} requests per batch")
+
+    indexes = {}  # batch key -> indexes of the requests that share it
+    for index, request in enumerate(requests):
+        indexes.setdefault(batch_key(request), []).append(index)
+    print(f"📦 Generating a batch of {len(requests)} requests ({len(indexes)} unique)")
+    metrics.increment("code_generator.batch.items", len(requests))
+    metrics.increment("code_generator.batch.deduplicated", len(requests) - len(indexes))
+
+    async def events():
+        slots = asyncio.Semaphore(CODE_BATCH_CONCURRENCY)
+
+        async def run(key):
+            async with slots:
+                return key, await generate_code_response(requests[indexes[key][0]], priority=BULK)
+
+        tasks = [asyncio.create_task(run(key)) for key in indexes]
+        failed = 0
+        try:
+            for finished in asyncio.as_completed(tasks):
+                key, response = await finished
+                first = indexes[key][0]
+                for index in indexes[key]:
+                    if not response.success:
+                        failed += 1
+                    yield {
+                        "type": "result",
+                        "index": index,
+                        "duplicate_of": first if index != first else None,
+                        **response.model_dump(),
+                        "done": False
+                    }
+            metrics.increment("code_generator.batch.failed", failed)
+            yield {
+                "type": "complete",
+                "total": len(requests),
+                "unique": len(indexes),
+                "succeeded": len(requests) - failed,
+                "failed": failed,
+                "done": True
+            }
+        finally:
+            # Finished, or the client went away: stop whatever is still queued or running
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(
+        SSEWriter().stream(stop_on_disconnect(events(), http_request)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
+    )
+
 @app.post("/improve")
 async def improve_code(request: dict):
     """Improve existing code with suggestions"""
@@ -332,8 +604,7 @@ async def improve_code(request: dict):
         Provide the improved version with explanations of changes made.
         """
         
-        response = model.generate_content(prompt)
-        improved_code = response.text.strip()
+        improved_code = (await llm.generate(prompt, priority="interactive")).strip()
         
         return {
             "success": True,
@@ -369,8 +640,8 @@ async def explain_code(request: dict):
         4. Potential improvements
         """
         
-        response = model.generate_content(prompt)
-        explanation = response.text.strip()
+        # Same code, same explanation: served from the shared cache when seen before
+        explanation = (await llm.generate(prompt, site="code_generator.explain", priority="interactive", cache=True)).strip()
         
         return {
             "success": True,
@@ -1,12 +1,12 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-import google.generativeai as genai
 import os
 import json
 import uvicorn
 import re
 from dotenv import load_dotenv
+from llm_client import get_client, deadline
 from typing import Optional, List, Dict
 from datetime import datetime
 import markdown
@@ -31,8 +31,11 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     raise ValueError("Please set GEMINI_API_KEY in your .env file")
 
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-1.5-flash')
+# Shared Gemini client: async calls with timeouts and a process-wide concurrency cap
+llm = get_client(GEMINI_API_KEY)
+
+# Seconds a /generate request may spend on Gemini calls in total
+CONTENT_GENERATION_DEADLINE = float(os.getenv("CONTENT_GENERATION_DEADLINE", "60"))
 
 # Request/Response Models
 class ContentRequest(BaseModel):
@@ -441,8 +444,10 @@ async def generate_content(request: ContentRequest):
         
         # Generate content using Gemini
         print("🤖 Sending request to Gemini AI...")
-        response = model.generate_content(prompt)
-        generated_content = response.text.strip()
+        with deadline(CONTENT_GENERATION_DEADLINE):
+            generated_content = (await llm.generate(
+                prompt, site="content_generator.generate_content", hedge=True
+            )).strip()
         
         print(f"✅ Generated {len(generated_content)} characters of content")
         
@@ -532,8 +537,7 @@ async def enhance_content(request: dict):
         Maintain the same HTML structure and CSS classes. Only enhance the content within the existing framework.
         """
         
-        response = model.generate_content(prompt)
-        enhanced_content = response.text.strip()
+        enhanced_content = (await llm.generate(prompt)).strip()
         
         return {
             "success": True,
@@ -0,0 +1,267 @@
+"""
+Deterministic local stand-in for Gemini, for offline load and latency testing
+Selected with LLM_BACKEND=fake; answers are shaped like what each StudyPal call site expects
+and depend only on the prompt, so runs are reproducible
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import time
+
+# Seconds before the first token, and generated tokens per second (0 = no delay)
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0.3"))
+FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "80"))
+# Tokens per streamed chunk
+FAKE_LLM_CHUNK_TOKENS = int(os.getenv("FAKE_LLM_CHUNK_TOKENS", "8"))
+
+CHARS_PER_TOKEN = 4
+
+_TOPIC_RE = re.compile(r'^\s*(?:Topic:|\*\*Requirement:\*\*|Student Question:)\s*(.+)$', re.MULTILINE)
+_LANGUAGE_RE = re.compile(r'Programming Language:\s*(\w+)')
+_COUNT_RE = re.compile(r'\b(?:Generate|Find|Create)\s+(\d+)')
+_SLIDES_RE = re.compile(r'(\d+) total slides')
+
+CODE_SAMPLES = {
+    "python": '''def solve(items):
+    """{requirement}"""
+    results = []
+    for item in items:
+        if item is None:
+            continue
+        results.append(item)
+    return results
+
+
+if __name__ == "__main__":
+    print(solve([1, None, 2, 3]))
+''',
+    "javascript": '''// {requirement}
+function solve(items) {{
+  const results = [];
+  for (const item of items) {{
+    if (item === null || item === undefined) continue;
+    results.push(item);
+  }}
+  return results;
+}}
+
+console.log(solve([1, null, 2, 3]));
+''',
+    "java": '''// {requirement}
+import java.util.ArrayList;
+import java.util.List;
+
+public class Solution {{
+    public static List<Integer> solve(List<Integer> items) {{
+        List<Integer> results = new ArrayList<>();
+        for (Integer item : items) {{
+            if (item != null) {{
+                results.add(item);
+            }}
+        }}
+        return results;
+    }}
+}}
+''',
+    "html": '''<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8">
+  <title>Generated Page</title>
+</head>
+<body>
+  <!-- {requirement} -->
+  <main>
+    <h1>Generated Page</h1>
+    <p>Content goes here.</p>
+  </main>
+</body>
+</html>
+''',
+    "css": '''/* {requirement} */
+.container {{
+  display: flex;
+  gap: 1rem;
+  padding: 1rem;
+}}
+''',
+}
+
+
+class FakeResponse:
+    """Mimics the SDK response/chunk objects: only ``text`` is used by the client"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeStream:
+    """Iterator of FakeResponse chunks, paced like a real stream; close() stops it"""
+
+    def __init__(self, text: str, latency: float, tokens_per_second: float, chunk_tokens: int):
+        self._text = text
+        self._latency = latency
+        self._tokens_per_second = tokens_per_second
+        self._chunk_chars = max(1, chunk_tokens * CHARS_PER_TOKEN)
+        self._closed = False
+
+    def __iter__(self):
+        time.sleep(self._latency)
+        for start in range(0, len(self._text), self._chunk_chars):
+            if self._closed:
+                return
+            piece = self._text[start:start + self._chunk_chars]
+            if self._tokens_per_second > 0:
+                time.sleep(len(piece) / CHARS_PER_TOKEN / self._tokens_per_second)
+            yield FakeResponse(piece)
+
+    def close(self):
+        self._closed = True
+
+
+class FakeGenerativeModel:
+    """Drop-in for genai.GenerativeModel.generate_content with canned, schema-shaped answers"""
+
+    def __init__(self, model_name: str = "fake", latency: float = FAKE_LLM_LATENCY,
+                 tokens_per_second: float = FAKE_LLM_TOKENS_PER_SECOND,
+                 chunk_tokens: int = FAKE_LLM_CHUNK_TOKENS):
+        self.model_name = model_name
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = chunk_tokens
+
+    def generate_content(self, contents, stream: bool = False, **kwargs):
+        prompt = contents if isinstance(contents, str) else "\n".join(
+            part for part in contents if isinstance(part, str)
+        )
+        text = fake_answer(prompt)
+        if stream:
+            return FakeStream(text, self.latency, self.tokens_per_second, self.chunk_tokens)
+
+        time.sleep(self.latency)
+        if self.tokens_per_second > 0:
+            time.sleep(len(text) / CHARS_PER_TOKEN / self.tokens_per_second)
+        return FakeResponse(text)
+
+
+def fake_answer(prompt: str) -> str:
+    """Pick the answer shape from the prompt: JSON template, code, HTML or chat markdown"""
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+    topic_match = _TOPIC_RE.search(prompt)
+    topic = topic_match.group(1).strip() if topic_match else "the topic"
+
+    template = json_template(prompt)
+    if template is not None:
+        return "```json\n" + json.dumps(fill_template(template, prompt, rng), indent=2) + "\n```"
+
+    language_match = _LANGUAGE_RE.search(prompt)
+    if language_match:
+        return fake_code(language_match.group(1).lower(), topic)
+    if "Briefly explain" in prompt:
+        return (f"This code implements {topic}. It walks through the input once, skips empty values "
+                "and returns the collected results. Errors are handled close to where they occur.")
+    if "HTML" in prompt:
+        return fake_html(topic, rng)
+    return fake_markdown(topic, rng)
+
+
+def json_template(prompt: str):
+    """Parse the JSON example that follows "OUTPUT FORMAT" in a prompt, if there is one"""
+    marker = prompt.find("OUTPUT FORMAT")
+    if marker < 0:
+        return None
+    starts = [i for i in (prompt.find("{", marker), prompt.find("[", marker)) if i >= 0]
+    if not starts:
+        return None
+    start = min(starts)
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for index in range(start, len(prompt)):
+        char = prompt[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                try:
+                    return json.loads(prompt[start:index + 1])
+                except json.JSONDecodeError:
+                    return None
+    return None
+
+
+def fill_template(template, prompt: str, rng: random.Random):
+    """Turn a prompt's example JSON into a full answer of the same shape"""
+    slides = _SLIDES_RE.search(prompt)
+    count = _COUNT_RE.search(prompt)
+
+    def fill(value, key=None):
+        if isinstance(value, dict):
+            return {k: fill(v, k) for k, v in value.items()}
+        if isinstance(value, list) and len(value) == 1 and isinstance(value[0], dict):
+            if key == "slides" and slides:
+                repeat = int(slides.group(1))
+            elif count:
+                repeat = int(count.group(1))
+            else:
+                repeat = 3
+            items = [fill(value[0], key) for _ in range(repeat)]
+            for number, item in enumerate(items, start=1):
+                for field in ("slide_number", "number", "id"):
+                    if isinstance(item.get(field), int):
+                        item[field] = number
+            return items
+        if isinstance(value, list):
+            return [fill(v, key) for v in value]
+        if isinstance(value, float):
+            return round(value + rng.uniform(-0.3, 0.3), 1) if 0 <= value <= 5 else value
+        if isinstance(value, int) and not isinstance(value, bool):
+            return max(0, value + rng.randint(-value // 4, value // 4))
+        return value
+
+    return fill(template)
+
+
+def fake_code(language: str, requirement: str) -> str:
+    """A short, valid program in the requested language"""
+    sample = CODE_SAMPLES.get(language, CODE_SAMPLES["python"])
+    fence = language if language in CODE_SAMPLES else "python"
+    return f"```{fence}\n{sample.format(requirement=requirement)}```"
+
+
+def fake_html(topic: str, rng: random.Random) -> str:
+    """Structured study content in the HTML shape the content and canvas services expect"""
+    sections = []
+    for number in range(1, rng.randint(3, 5) + 1):
+        points = "".join(f"<li>Key point {point} about {topic}</li>" for point in range(1, rng.randint(3, 5) + 1))
+        sections.append(
+            f"<h2>Section {number}</h2>\n<p>An explanation of part {number} of {topic}, "
+            f"with an example students can follow step by step.</p>\n<ul>{points}</ul>"
+        )
+    return f"<h1>{topic}</h1>\n" + "\n".join(sections) + "\n<h3>Final Answer</h3>\n<p>x = 42</p>"
+
+
+def fake_markdown(topic: str, rng: random.Random) -> str:
+    """A StudyPal-style chat answer with headings, bullets and steps"""
+    lines = [f"## {topic}", "", f"Here is a clear overview of {topic}.", ""]
+    for number in range(1, rng.randint(2, 4) + 1):
+        lines += [f"### Key Idea {number}", f"This is an important concept you should understand and practice."]
+        lines += [f"* Point {point} explains one part of the idea" for point in range(1, rng.randint(2, 4) + 1)]
+        lines.append("")
+    lines += ["### Steps", "1. Review the definition", "2. Work through an example", "3. Practice on your own", ""]
+    lines += ["### Remember", "* Practice a little every day"]
+    return "\n".join(lines)
@@ -0,0 +1,131 @@
+"""
+Line-oriented response formatter for StudyPal Chat
+Formats each line once as it completes, so streamed answers never need a full re-format at the end
+"""
+
+import re
+
+_HEADING_RE = re.compile(r'^(#{1,3})\s*(.+)$')
+_BULLET_RE = re.compile(r'^(\*|\-)\s*(.+)$')
+_NUMBERED_RE = re.compile(r'^(\d+\.)\s*(.+)$')
+_PHRASE_RE = re.compile(
+    r'\b(Key point|Important|Note|Remember|Tip|Warning|Example|Summary|Conclusion):\s*',
+    re.IGNORECASE
+)
+_SPACED_HEADING_RE = re.compile(r'#{1,3}\s+.+$')
+_SECTION_START_RE = re.compile(r'#{1,3}\s')
+
+
+def format_line(line: str):
+    """Format a single complete line (without its newline)
+
+    Returns the formatted line and whether it ends with a lead-in phrase such as
+    "Note:", in which case the following whitespace and line break are folded into it.
+    """
+    # Enhance section headers with better formatting
+    line = _HEADING_RE.sub(r'\1 **\2**', line)
+
+    # Enhance bullet points with better formatting
+    line = _BULLET_RE.sub(r'• **\2**', line)
+
+    # Enhance numbered lists
+    line = _NUMBERED_RE.sub(r'**\1** \2', line)
+
+    # Highlight important phrases at the start of sentences
+    ends_with_phrase = False
+    parts = []
+    position = 0
+    for match in _PHRASE_RE.finditer(line):
+        parts.append(line[position:match.start()])
+        parts.append(f"**{match.group(1)}:** ")
+        position = match.end()
+        ends_with_phrase = position == len(line)
+    parts.append(line[position:])
+
+    return "".join(parts), ends_with_phrase
+
+
+class StreamingFormatter:
+    """Incrementally format streamed text, keeping heading/list/spacing state across chunks
+
+    feed() returns the formatted output for every line completed so far; finish()
+    flushes the last line. The concatenated output matches running the formatting
+    rules over the whole response at once, except that a bare list or heading marker
+    with nothing after it on its line is formatted on its own line rather than being
+    merged with the next one.
+    """
+
+    def __init__(self):
+        self._partial = ""
+        self._line_out = None      # formatted line still open because it ends with "Note:" etc.
+        self._joining = False
+        self._pending_newlines = 0
+        self._first_line = True
+
+    def feed(self, text: str) -> str:
+        """Consume streamed text and return newly finished formatted output"""
+        self._partial += text
+        if "\n" not in self._partial:
+            return ""
+
+        *lines, self._partial = self._partial.split("\n")
+        return "".join([self._complete_line(line, newline=True) for line in lines])
+
+    def finish(self) -> str:
+        """Flush the final line and any trailing spacing"""
+        output = self._complete_line(self._partial, newline=False)
+        self._partial = ""
+        if self._line_out is not None:
+            output += self._emit_line(self._line_out, newline=False)
+            self._line_out = None
+        return output + self._flush_newlines()
+
+    def _complete_line(self, line: str, newline: bool) -> str:
+        formatted, ends_with_phrase = format_line(line)
+
+        if self._joining:
+            if not formatted.strip():
+                # Whitespace after a lead-in phrase is absorbed, blank lines included
+                return ""
+            self._line_out += formatted.lstrip()
+        else:
+            self._line_out = formatted
+
+        self._joining = ends_with_phrase
+        if self._joining:
+            return ""
+
+        output = self._emit_line(self._line_out, newline)
+        self._line_out = None
+        return output
+
+    def _emit_line(self, line: str, newline: bool) -> str:
+        output = ""
+
+        # Ensure proper spacing between sections
+        if not self._first_line and _SECTION_START_RE.match(line + ("\n" if newline else "")):
+            self._pending_newlines += 1
+        self._first_line = False
+
+        if line:
+            output += self._flush_newlines() + line
+
+        # Add spacing after headings
+        if _SPACED_HEADING_RE.match(line):
+            self._pending_newlines += 1
+
+        if newline:
+            self._pending_newlines += 1
+        return output
+
+    def _flush_newlines(self) -> str:
+        # Clean up multiple newlines
+        newlines = "\n" * min(self._pending_newlines, 2)
+        self._pending_newlines = 0
+        return newlines
+
+
+def format_response(text: str) -> str:
+    """Apply final formatting improvements to a complete response"""
+    formatter = StreamingFormatter()
+    return formatter.feed(text) + formatter.finish()
@@ -0,0 +1,130 @@
+"""
+StudyPal API Gateway
+Serves every backend service from one process: each service's FastAPI app is mounted under
+a prefix and shares the gateway's middleware, the process-wide LLM client and its caches
+"""
+
+import importlib
+import os
+import time
+
+from dotenv import load_dotenv
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+
+import metrics
+
+load_dotenv()
+
+# Mount prefix, module, and the port the service uses when run on its own
+SERVICES = {
+    "smart_canvas": ("/canvas", "smart_canvas", 8000),
+    "code_generator": ("/code", "code_generator", 8001),
+    "resource_provider": ("/resources", "resource_provider", 8004),
+    "content_generator": ("/content", "content_generator", 8009),
+    "chat": ("/chat", "chat", 8012),
+    # "pptmaker": ("/ppt", "pptmaker", 8002),  # its FastAPI app is commented out in pptmaker.py
+}
+
+# Comma-separated services this process serves (default: all). Run several gateways with
+# different GATEWAY_WORKERS to give busy services more worker processes than quiet ones
+# (a gateway serving chat runs one worker, see run_gateway.py).
+GATEWAY_SERVICES = [name.strip() for name in os.getenv("GATEWAY_SERVICES", ",".join(SERVICES)).split(",") if name.strip()]
+GATEWAY_CORS_ORIGINS = [origin.strip() for origin in os.getenv("GATEWAY_CORS_ORIGINS", "http://localhost:3000").split(",")]
+
+
+class RequestMetricsMiddleware:
+    """Count requests, server errors and time spent per mounted service
+
+    Plain ASGI, so streaming responses (SSE) and websockets pass through untouched.
+    """
+
+    def __init__(self, app, prefixes: dict):
+        self.app = app
+        # Longest prefix first, so /chat does not swallow a future /chatbot
+        self.prefixes = sorted(prefixes.items(), key=lambda item: len(item[1]), reverse=True)
+
+    def _service(self, path: str) -> str:
+        for name, prefix in self.prefixes:
+            if path == prefix or path.startswith(prefix + "/"):
+                return name
+        return "gateway"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        service = self._service(scope["path"])
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.increment(f"gateway.{service}.requests")
+            metrics.increment(f"gateway.{service}.ms", round((time.perf_counter() - started) * 1000))
+            if status >= 500:
+                metrics.increment(f"gateway.{service}.errors")
+
+
+def _without_cors(service_app: FastAPI):
+    """Drop a service's own CORS layer; the gateway applies one policy to every request"""
+    service_app.user_middleware = [
+        middleware for middleware in service_app.user_middleware if middleware.cls is not CORSMiddleware
+    ]
+
+
+def create_app(services=None) -> FastAPI:
+    """Build the gateway app with the named services mounted under their prefixes"""
+    services = services or list(SERVICES)
+    unknown = [name for name in services if name not in SERVICES]
+    if unknown:
+        raise ValueError(f"Unknown service(s) {', '.join(unknown)}; available: {', '.join(SERVICES)}")
+
+    gateway = FastAPI(title="StudyPal Gateway")
+    mounted = {}
+    for name in services:
+        prefix, module_name, _ = SERVICES[name]
+        started = time.perf_counter()
+        service_app = importlib.import_module(module_name).app
+        _without_cors(service_app)
+        gateway.mount(prefix, service_app)
+        mounted[name] = {"prefix": prefix, "import_seconds": round(time.perf_counter() - started, 3)}
+        print(f"✅ Mounted {name} at {prefix}")
+
+    gateway.add_middleware(
+        CORSMiddleware,
+        allow_origins=GATEWAY_CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    gateway.add_middleware(RequestMetricsMiddleware, prefixes={name: info["prefix"] for name, info in mounted.items()})
+
+    @gateway.get("/health")
+    async def health():
+        from llm_client import get_client
+        return {
+            "status": "healthy",
+            "service": "StudyPal Gateway",
+            "pid": os.getpid(),
+            "services": mounted,
+            "llm": get_client().stats(),
+        }
+
+    @gateway.get("/metrics")
+    async def gateway_metrics():
+        """Counters for every mounted service, the gateway and the shared LLM client"""
+        return metrics.snapshot()
+
+    return gateway
+
+
+app = create_app(GATEWAY_SERVICES)
@@ -0,0 +1,120 @@
+"""
+Precompiled word highlighter for StudyPal Chat
+Scans a buffer once with a single combined regex instead of thirteen re.sub passes
+"""
+
+import re
+from collections import Counter
+
+# Keyword groups for important words/phrases to highlight. The legacy highlighter
+# ran one regex per group in sequence, so a word listed in two groups (e.g.
+# "method") ends up wrapped twice; the depth table below preserves that output.
+HIGHLIGHT_KEYWORD_GROUPS = [
+    # Academic terms
+    ["definition", "theorem", "formula", "equation", "concept", "principle", "theory", "hypothesis",
+     "analysis", "conclusion", "method", "approach", "technique", "strategy"],
+    # Programming terms
+    ["function", "variable", "array", "object", "class", "method", "algorithm", "syntax", "debugging",
+     "compilation", "loop", "condition", "statement"],
+    # Math terms
+    ["derivative", "integral", "matrix", "vector", "polynomial", "exponential", "logarithm",
+     "trigonometry", "algebra", "geometry", "calculus"],
+    # Science terms
+    ["molecule", "atom", "electron", "photon", "DNA", "RNA", "protein", "enzyme", "catalyst", "reaction",
+     "hypothesis", "experiment", "observation"],
+    # Important connectors and emphasis
+    ["important", "key", "crucial", "essential", "fundamental", "critical", "significant", "main",
+     "primary", "basic", "advanced", "complex"],
+    ["always", "never", "must", "should", "cannot", "will not", "definitely", "absolutely", "typically",
+     "usually", "often", "rarely"],
+    # Study and learning terms
+    ["study", "learn", "practice", "review", "understand", "memorize", "analyze", "solve", "calculate",
+     "explain", "demonstrate", "apply"],
+    # Question and answer terms
+    ["question", "answer", "solution", "problem", "example", "step", "process", "procedure",
+     "instruction", "guide", "tutorial"],
+    # Organizational terms
+    ["first", "second", "third", "next", "then", "finally", "conclusion", "summary", "overview",
+     "introduction", "background"],
+]
+
+NUMBER_UNITS = ["percent", "%", "degrees", "minutes", "seconds", "hours", "days", "years"]
+
+# "Step N" is not listed: "step" is a keyword, so the legacy section pass never saw a bare "Step N"
+SECTION_MARKERS = ["Part", "Section", "Chapter"]
+
+_KEYWORD_DEPTH = Counter(word.casefold() for group in HIGHLIGHT_KEYWORD_GROUPS for word in group)
+_KEYWORD_GROUP_RES = [
+    re.compile(r'(?:%s)' % '|'.join(map(re.escape, group)), re.IGNORECASE)
+    for group in HIGHLIGHT_KEYWORD_GROUPS
+]
+
+_KEYWORDS = '|'.join(
+    re.escape(word) for word in sorted(
+        {w for group in HIGHLIGHT_KEYWORD_GROUPS for w in group}, key=len, reverse=True
+    )
+)
+
+# A "%" immediately followed by a keyword was never highlighted: the keyword pass ran
+# first and the inserted "**" removed the word boundary after the percent sign.
+_UNITS = '|'.join(
+    r'%%(?!(?:%s)\b)' % _KEYWORDS if unit == '%' else re.escape(unit) for unit in NUMBER_UNITS
+)
+_NUMBER = r'\d+(?:\.\d+)?\s*(?:%s)\b' % _UNITS
+
+HIGHLIGHT_RE = re.compile(
+    r'(?P<tick>`)'
+    r'|\b(?P<num>%(number)s)'
+    r'|^(?P<list>\d+\.)\s'
+    r'|\b(?P<section>(?:%(sections)s) (?!%(number)s)\d+)\b'
+    r'|\b(?P<kw>%(keywords)s)\b' % {
+        'number': _NUMBER,
+        'sections': '|'.join(SECTION_MARKERS),
+        'keywords': _KEYWORDS,
+    },
+    re.IGNORECASE | re.MULTILINE,
+)
+_NUMBER_PARTS_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(.+)', re.DOTALL)
+_CODE_SPAN_AHEAD_RE = re.compile(r'[^`]+`')
+
+
+def _keyword_depth(word: str) -> int:
+    """Number of legacy keyword passes that would have wrapped this word"""
+    depth = _KEYWORD_DEPTH.get(word.casefold())
+    if depth is None:
+        # Unicode case-insensitive matches whose casefold differs from the listed spelling
+        depth = sum(1 for group_re in _KEYWORD_GROUP_RES if group_re.fullmatch(word))
+    return depth
+
+
+def highlight_important_words(text: str) -> str:
+    """Add markdown bold highlighting to important words in a single scan"""
+    in_code_span = False
+
+    def replace(match):
+        nonlocal in_code_span
+        kind = match.lastgroup
+
+        if kind == 'kw':
+            marker = '**' * _keyword_depth(match.group('kw'))
+            return f"{marker}{match.group('kw')}{marker}"
+
+        if kind == 'tick':
+            if in_code_span:
+                in_code_span = False
+                return '`**'
+            if _CODE_SPAN_AHEAD_RE.match(text, match.end()):
+                in_code_span = True
+                return '**`'
+            return '`'
+
+        if kind == 'num':
+            number, unit = _NUMBER_PARTS_RE.match(match.group('num')).groups()
+            return f"**{number} {unit}**"
+
+        if kind == 'list':
+            return f"**{match.group('list')}** "
+
+        return f"**{match.group('section')}**"
+
+    return HIGHLIGHT_RE.sub(replace, text)
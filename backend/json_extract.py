@@ -0,0 +1,289 @@
+"""
+Tolerant JSON extraction for LLM answers in the StudyPal backend services
+Finds the first balanced JSON object or array in a response (ignoring code fences and prose),
+repairs trailing commas and truncated output, and can parse array elements as they stream in
+"""
+
+import json
+import time
+from typing import List, Optional
+
+import metrics
+
+# Give up after this many candidate start positions (e.g. braces in prose before the JSON)
+MAX_CANDIDATES = 10
+# Truncation repair tries cutting back to at most this many earlier element boundaries
+MAX_CUTS = 50
+
+_decoder = json.JSONDecoder()
+
+
+class JSONExtractionError(ValueError):
+    """No usable JSON value could be recovered from the text"""
+
+
+def _scan(text: str, start: int):
+    """Copy one JSON value from text[start], dropping trailing commas and fixing mismatched closers
+
+    Returns (copied text, end index, balanced, in_string, open closers, cut points). Cut points are
+    (length, open closers) pairs at element boundaries, used to cut back truncated output.
+    """
+    out = []
+    stack = []
+    cuts = []
+    in_string = False
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+            out.append(char)
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+            out.append(char)
+            cuts.append((len(out), tuple(stack)))
+        elif char in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()  # trailing comma
+            out.append(stack.pop())  # the closer we expected, even if the model wrote the other one
+            if not stack:
+                return "".join(out), index + 1, True, False, (), cuts
+            cuts.append((len(out), tuple(stack)))
+        else:
+            if char == ",":
+                cuts.append((len(out), tuple(stack)))
+            out.append(char)
+    return "".join(out), len(text), False, in_string, tuple(stack), cuts
+
+
+def _close(prefix: str, stack) -> str:
+    prefix = prefix.rstrip()
+    if prefix.endswith(","):
+        prefix = prefix[:-1]
+    return prefix + "".join(reversed(stack))
+
+
+def _repair_truncated(copied: str, in_string: bool, stack, cuts):
+    """Close a value that was cut off, cutting back to an earlier element if the tail is unusable"""
+    candidates = [_close(copied + ('"' if in_string else ""), stack)]
+    candidates += [_close(copied[:length], open_stack) for length, open_stack in reversed(cuts[-MAX_CUTS:])]
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    raise JSONExtractionError("Truncated JSON could not be repaired")
+
+
+def parse_json(text: str, expect: Optional[type] = None):
+    """Return (value, repaired) for the first JSON object or array in text
+
+    ``expect`` (dict or list) skips candidates of the other type, e.g. a bracketed aside in
+    prose before the real answer. Raises JSONExtractionError if nothing usable is found.
+    """
+    if not text:
+        raise JSONExtractionError("Empty response")
+    openers = "{" if expect is dict else "[" if expect is list else "{["
+    position = 0
+    for _ in range(MAX_CANDIDATES):
+        starts = [index for index in (text.find(opener, position) for opener in openers) if index >= 0]
+        if not starts:
+            break
+        start = min(starts)
+        try:
+            # Fast path: well-formed JSON, with anything after it ignored
+            value, _ = _decoder.raw_decode(text, start)
+            if expect is None or isinstance(value, expect):
+                return value, False
+            position = start + 1
+            continue
+        except ValueError:
+            pass
+        copied, end, balanced, in_string, stack, cuts = _scan(text, start)
+        try:
+            if balanced:
+                value = json.loads(copied)
+                repaired = copied != text[start:end]
+            else:
+                value = _repair_truncated(copied, in_string, stack, cuts)
+                repaired = True
+        except ValueError:
+            position = start + 1
+            continue
+        if expect is None or isinstance(value, expect):
+            return value, repaired
+        position = start + 1
+    raise JSONExtractionError("No JSON object or array found in the response")
+
+
+def extract_json(text: str, site: Optional[str] = None, expect: Optional[type] = None):
+    """parse_json() with outcome and timing metrics (llm.json.*), per call site if given"""
+    started = time.perf_counter()
+    outcome = "failed"
+    try:
+        value, repaired = parse_json(text, expect)
+        outcome = "repaired" if repaired else "ok"
+        return value
+    finally:
+        metrics.increment("llm.json.parses")
+        metrics.increment("llm.json.parse_us", round((time.perf_counter() - started) * 1e6))
+        metrics.increment(f"llm.json.{outcome}")
+        if site:
+            metrics.increment(f"llm.json.{outcome}.{site}")
+
+
+class JSONArrayStream:
+    """Parse the elements of a JSON array as its text streams in
+
+    feed() takes the next chunk of model output and returns the elements completed by it.
+    Text before the array (a code fence, prose) is skipped: a ``[`` only starts it when an
+    object, array or string follows, and an array that produced no elements (a bracketed
+    aside such as "[curated]") is passed over. An element still open when the stream ends
+    is dropped rather than guessed at. Elements that are not instances of ``expect_items``
+    are dropped too.
+    """
+
+    def __init__(self, expect_items: Optional[type] = None):
+        self._expect_items = expect_items
+        self._array_count = 0  # self.count when the current array started
+        self._buffer = ""
+        self._position = 0
+        self._depth = 0  # 0 = before the array, 1 = between elements
+        self._in_string = False
+        self._escaped = False
+        self._element_start = None
+        self.done = False
+        self.count = 0
+
+    def _element(self, raw: str) -> List:
+        raw = raw.strip()
+        if not raw:
+            return []
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            try:
+                value, _ = parse_json(raw)
+            except JSONExtractionError:
+                metrics.increment("llm.json.stream_skipped")
+                return []
+        if self._expect_items is not None and not isinstance(value, self._expect_items):
+            return []
+        self.count += 1
+        return [value]
+
+    def feed(self, chunk: str) -> List:
+        items = []
+        if self.done:
+            return items
+        self._buffer += chunk
+        text = self._buffer
+        index = self._position
+        while index < len(text):
+            char = text[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif self._depth == 0:
+                if char == "[":
+                    follow = index + 1
+                    while follow < len(text) and text[follow].isspace():
+                        follow += 1
+                    if follow == len(text):
+                        break  # wait for the next chunk to see what the bracket holds
+                    if text[follow] in '{["':
+                        self._depth = 1
+                        self._array_count = self.count
+            elif char == '"':
+                self._in_string = True
+                if self._element_start is None:
+                    self._element_start = index
+            elif char in "{[":
+                if self._element_start is None:
+                    self._element_start = index
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    items += self._element(text[self._element_start:index + 1])
+                    self._element_start = None
+                elif self._depth == 0:
+                    # End of the array; a scalar element may still be pending
+                    if self._element_start is not None:
+                        items += self._element(text[self._element_start:index])
+                        self._element_start = None
+                    if self.count > self._array_count:
+                        self.done = True
+                        break
+                    # Nothing usable in it: keep looking for the real array
+            elif self._depth == 1 and char == ",":
+                if self._element_start is not None:
+                    items += self._element(text[self._element_start:index])
+                    self._element_start = None
+            elif self._depth == 1 and not char.isspace() and self._element_start is None:
+                self._element_start = index  # a number, true/false/null
+            index += 1
+
+        # Keep only the unfinished element, so the buffer does not grow with the whole answer
+        keep = self._element_start if self._element_start is not None else index
+        self._buffer = text[keep:]
+        self._position = index - keep
+        if self._element_start is not None:
+            self._element_start = 0
+        return items
+
+
+async def iter_json_array(chunks, site: Optional[str] = None, expect_items: Optional[type] = None):
+    """Yield array elements from an async iterator of text chunks as soon as each is complete
+
+    If the answer held no streamable array (e.g. it was wrapped in an object), the whole text
+    goes through extract_json() once the stream ends. Errors from ``chunks`` are raised after
+    the elements that did arrive, so callers can keep a partial result.
+    """
+    parser = JSONArrayStream(expect_items)
+    text = ""
+    parse_seconds = 0.0
+    complete = False  # the array closed, or the caller had all it wanted
+    try:
+        async for chunk in chunks:
+            text += chunk
+            started = time.perf_counter()
+            items = parser.feed(chunk)
+            parse_seconds += time.perf_counter() - started
+            for item in items:
+                yield item
+            if parser.done:
+                break
+        complete = parser.done
+    except GeneratorExit:
+        complete = True
+        raise
+    finally:
+        if hasattr(chunks, "aclose"):
+            await chunks.aclose()  # stops the model once the array is complete
+        if parser.count:
+            outcome = "ok" if complete else "repaired"
+            metrics.increment("llm.json.parses")
+            metrics.increment("llm.json.parse_us", round(parse_seconds * 1e6))
+            metrics.increment(f"llm.json.{outcome}")
+            if site:
+                metrics.increment(f"llm.json.{outcome}.{site}")
+
+    if not parser.count:
+        for item in extract_json(text, site, expect=list):
+            if expect_items is None or isinstance(item, expect_items):
+                yield item
@@ -0,0 +1,138 @@
+"""
+Persistent LLM response cache shared by every StudyPal service
+Content-addressed by (model, generation config, prompt) in a local SQLite file, so any worker
+process that sees a prompt again (e.g. the same topic from another student) reuses the answer
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Optional
+
+import metrics
+from json_extract import parse_json, JSONExtractionError
+from transcripts import prompt_key
+
+DEFAULT_CACHE_PATH = os.path.join(tempfile.gettempdir(), "studypal_llm_cache.sqlite3")
+
+# Don't rewrite an entry's access time more often than this; LRU order only needs to be rough
+_TOUCH_INTERVAL = 60
+
+# Re-read the cache size at least this often, to see entries stored by other workers
+_SIZE_CHECK_INTERVAL = 60
+
+# Eviction frees space down to this share of max_bytes, so it doesn't run on every store
+_EVICT_TO = 0.9
+
+
+def cache_key(model_name: str, contents, generation_config=None) -> str:
+    """Hash of everything that determines a model's answer"""
+    return hashlib.sha256(f"{model_name}\x00{prompt_key(contents, generation_config)}".encode("utf-8")).hexdigest()
+
+
+def is_json_answer(text: str) -> bool:
+    """cache_if check for prompts that ask for JSON: only keep answers that parse"""
+    try:
+        parse_json(text)
+    except JSONExtractionError:
+        return False
+    return True
+
+
+class LLMCache:
+    """Size-capped SQLite cache of LLM responses with LRU eviction and per-entry TTL
+
+    Safe to share between uvicorn workers: SQLite in WAL mode lets readers run alongside a
+    writer, and every write is a single short transaction.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, site TEXT, value TEXT NOT NULL, "
+            "size INTEGER NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        self._lock = threading.Lock()
+        # Running estimate of the stored bytes; other workers' stores show up at the next size check
+        self._bytes = self._stored_bytes()
+        self._size_checked_at = time.monotonic()
+
+    def get(self, key: str, site: Optional[str] = None) -> Optional[str]:
+        """Return the cached response, or None on a miss or an expired entry"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, accessed_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is not None and now - row[1] > _TOUCH_INTERVAL:
+                self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        outcome = "hits" if row is not None else "misses"
+        metrics.increment(f"llm.cache.{outcome}")
+        if site:
+            metrics.increment(f"llm.cache.{outcome}.{site}")
+        return row[0] if row is not None else None
+
+    def set(self, key: str, value: str, ttl_seconds: float, site: Optional[str] = None):
+        """Store a response; once the cache is over max_bytes, evict expired and least recently used entries"""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        evicted = 0
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, site, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, site, value, size, now + ttl_seconds, now)
+            )
+            self._bytes += size
+            if self._bytes > self.max_bytes or time.monotonic() - self._size_checked_at > _SIZE_CHECK_INTERVAL:
+                self._bytes = self._stored_bytes()
+                self._size_checked_at = time.monotonic()
+                if self._bytes > self.max_bytes:
+                    evicted = self._evict(now)
+        metrics.increment("llm.cache.stores")
+        if evicted:
+            metrics.increment("llm.cache.evictions", evicted)
+
+    def _stored_bytes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _evict(self, now: float) -> int:
+        """Drop expired entries, then the least recently used until under _EVICT_TO of max_bytes (lock held)"""
+        evicted = self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+        excess = self._stored_bytes() - self.max_bytes * _EVICT_TO
+        oldest = []
+        if excess > 0:
+            # Walks the accessed_at index from the oldest entry; no sort over the whole table
+            rows = self._db.execute("SELECT key, size FROM responses ORDER BY accessed_at")
+            for key, size in rows:
+                oldest.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            rows.close()
+            self._db.executemany("DELETE FROM responses WHERE key = ?", oldest)
+        self._bytes = self._stored_bytes()
+        return evicted + len(oldest)
+
+    def stats(self) -> dict:
+        """Entry count, size and hit rate, for health reporting"""
+        with self._lock:
+            entries, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        counters = metrics.snapshot("llm.cache.")
+        hits, misses = counters.get("llm.cache.hits", 0), counters.get("llm.cache.misses", 0)
+        return {
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        }
@@ -0,0 +1,553 @@
+"""
+Shared Gemini client for the StudyPal backend services
+One configured SDK and model handle per process, async generate/stream with per-call timeouts,
+a process-wide, priority-aware concurrency cap, and every generation config in one place
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+from dotenv import load_dotenv
+
+import metrics
+from streaming import iterate_in_thread
+from rate_limiter import KeyPool, DEFAULT_LIMITS_PATH, key_id
+from scheduler import FairScheduler, INTERACTIVE, BULK
+from circuit_breaker import CircuitBreaker
+from llm_cache import LLMCache, DEFAULT_CACHE_PATH, cache_key
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# "gemini" for the real API, "fake" for the offline stand-in in fake_llm.py
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-1.5-flash")
+# Seconds to wait for a whole answer (generate) or for the next chunk (stream)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+# Gemini calls in flight at once across the whole process; the rest wait their turn
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+# Slots only interactive calls (chat, smart canvas, code generation) may use
+LLM_INTERACTIVE_RESERVED = int(os.getenv("LLM_INTERACTIVE_RESERVED", "4"))
+# Share of freed slots each class gets while both are waiting
+LLM_INTERACTIVE_WEIGHT = float(os.getenv("LLM_INTERACTIVE_WEIGHT", "3"))
+LLM_BULK_WEIGHT = float(os.getenv("LLM_BULK_WEIGHT", "1"))
+
+# Comma-separated pool of API keys shared by every service (falls back to GEMINI_API_KEY)
+LLM_API_KEYS = [key.strip() for key in os.getenv("GEMINI_API_KEYS", "").split(",") if key.strip()]
+# Per-key Gemini quota; set either to 0 to turn rate limiting off
+LLM_RPM_PER_KEY = float(os.getenv("LLM_RPM_PER_KEY", "60"))
+LLM_TPM_PER_KEY = float(os.getenv("LLM_TPM_PER_KEY", "1000000"))
+# How long a call may wait for quota before failing, and where the shared buckets live
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+LLM_RATE_LIMIT_PATH = os.getenv("LLM_RATE_LIMIT_PATH", DEFAULT_LIMITS_PATH)
+# Output tokens reserved for a call with no max_output_tokens, until the real size is known
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "1024"))
+# Gemini bills an image prompt part as a fixed number of tokens
+IMAGE_PROMPT_TOKENS = 258
+CHARS_PER_TOKEN = 4
+
+# Circuit breaker: open when this share of the calls in the window failed or took longer than
+# LLM_BREAKER_SLOW_CALL seconds (0 turns it off), then probe Gemini every LLM_BREAKER_OPEN_SECONDS
+LLM_BREAKER_FAILURE_RATIO = float(os.getenv("LLM_BREAKER_FAILURE_RATIO", "0.5"))
+LLM_BREAKER_WINDOW = float(os.getenv("LLM_BREAKER_WINDOW", "30"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+LLM_BREAKER_SLOW_CALL = float(os.getenv("LLM_BREAKER_SLOW_CALL", "15"))
+LLM_BREAKER_OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "10"))
+# Seconds a recovery probe may take
+LLM_BREAKER_PROBE_TIMEOUT = float(os.getenv("LLM_BREAKER_PROBE_TIMEOUT", "10"))
+
+# Opt-in hedging: a second attempt starts once the first has run longer than this percentile
+# of the site's recent latencies, or LLM_HEDGE_DELAY seconds until enough calls were seen
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "8"))
+HEDGE_MIN_SAMPLES = 20
+LATENCY_SAMPLES = 200
+
+# "record" appends every completed call to LLM_TRANSCRIPT_PATH; "replay" answers from it offline
+LLM_TRANSCRIPT_MODE = os.getenv("LLM_TRANSCRIPT_MODE", "").lower()
+LLM_TRANSCRIPT_PATH = os.getenv("LLM_TRANSCRIPT_PATH", "llm_transcript.jsonl")
+# Replay timing multiplier: 1.0 = as recorded, 0 = no delays
+LLM_REPLAY_SPEED = float(os.getenv("LLM_REPLAY_SPEED", "1.0"))
+
+# Persistent response cache for call sites that opt in with cache=True (0 MB turns it off)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+# How long a cached answer stays valid, by call site (others use LLM_CACHE_TTL)
+CACHE_TTLS = {
+    "code_generator.explain": 7 * 86400,
+    "ppt_agents.quality_assurance": 86400,
+    "resource_provider.get_real_resource_urls": 3 * 86400,  # links go stale sooner than explanations
+}
+
+# Generation settings by call site; anything not listed uses the SDK defaults
+GENERATION_PROFILES = {
+    "default": {},
+    "content_strategist": {
+        'temperature': 0.8,
+        'top_p': 0.9,
+        'max_output_tokens': 3000
+    },
+    "design_specialist": {
+        'temperature': 0.7,
+        'top_p': 0.8,
+        'max_output_tokens': 2000
+    },
+    "visual_curator": {
+        'temperature': 0.9,
+        'top_p': 0.95,
+        'max_output_tokens': 1500
+    },
+    "narrative_architect": {
+        'temperature': 0.6,
+        'top_p': 0.85,
+        'max_output_tokens': 2500
+    },
+    "quality_assurance": {
+        'temperature': 0.3,
+        'top_p': 0.7,
+        'max_output_tokens': 2000
+    },
+}
+
+
+def _gemini_model(model_name: str, api_key: str):
+    """Model handle bound to one API key"""
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(model_name)
+    # genai.configure() is process-wide, so pin this key's transport to the handle now
+    model._client = genai_client.get_default_generative_client()
+    return model
+
+
+def create_models(backend: str, model_name: str, api_keys: List[str], transcript_mode: str = "") -> dict:
+    """Build one model handle per API key; all of them expose the SDK's generate_content()"""
+    if transcript_mode == "replay":
+        from transcripts import ReplayModel
+        return {"replay": ReplayModel(LLM_TRANSCRIPT_PATH, LLM_REPLAY_SPEED)}
+
+    if backend == "fake":
+        from fake_llm import FakeGenerativeModel
+        fake = FakeGenerativeModel(model_name)
+        models = {key: fake for key in (api_keys or ["fake"])}
+    elif backend == "gemini":
+        if not api_keys:
+            raise ValueError("Please set GEMINI_API_KEY in your .env file")
+        models = {key: _gemini_model(model_name, key) for key in api_keys}
+    else:
+        raise ValueError(f"Unknown LLM_BACKEND '{backend}' (expected 'gemini' or 'fake')")
+
+    if transcript_mode == "record":
+        from transcripts import RecordingModel
+        return {key: RecordingModel(model, LLM_TRANSCRIPT_PATH) for key, model in models.items()}
+    if transcript_mode:
+        raise ValueError(f"Unknown LLM_TRANSCRIPT_MODE '{transcript_mode}' (expected 'record' or 'replay')")
+    return models
+
+
+def estimate_tokens(contents) -> int:
+    """Rough prompt size in tokens, for reserving rate-limit capacity"""
+    parts = contents if isinstance(contents, (list, tuple)) else [contents]
+    return sum(
+        len(part) // CHARS_PER_TOKEN + 1 if isinstance(part, str) else IMAGE_PROMPT_TOKENS
+        for part in parts
+    )
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """The request's end-to-end deadline passed before the LLM call could finish"""
+
+
+_deadline = contextvars.ContextVar("llm_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: float):
+    """Give every LLM call made inside the block (including from tasks it starts) one shared time limit
+
+    Nested blocks can only shorten the limit, never extend it.
+    """
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(current, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _remaining(at: float) -> float:
+    remaining = at - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return remaining
+
+
+def time_left(timeout: float) -> float:
+    """``timeout`` shortened to what is left of the current request's deadline"""
+    at = _deadline.get()
+    if at is None:
+        return timeout
+    return min(timeout, _remaining(at))
+
+
+class LatencyTracker:
+    """Latencies of recent successful calls, per call site"""
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self.samples = samples
+        self._by_site = {}
+
+    def record(self, site: Optional[str], seconds: float):
+        recent = self._by_site.get(site)
+        if recent is None:
+            recent = self._by_site[site] = deque(maxlen=self.samples)
+        recent.append(seconds)
+
+    def percentile(self, site: Optional[str], percent: float) -> Optional[float]:
+        """The given percentile of the site's latencies, or None with too few samples"""
+        recent = self._by_site.get(site)
+        if not recent or len(recent) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class LLMClient:
+    """Async front end for Gemini shared by every service in the process
+
+    The SDK call runs on a worker thread, so handlers never block the event loop. Model
+    handles (and the SDK's underlying connections) are created once per API key and reused.
+    Each call first waits for a slot in the FairScheduler by priority class, then takes a
+    key from the shared KeyPool, which keeps every service and worker on this machine
+    inside the per-key request and token quotas. While the circuit breaker is open, calls
+    raise CircuitOpenError at once so callers go straight to their fallbacks.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, model_name: str = LLM_MODEL,
+                 timeout: float = LLM_TIMEOUT, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 backend: str = LLM_BACKEND, transcript_mode: str = LLM_TRANSCRIPT_MODE):
+        self.backend = backend
+        self.model_name = model_name
+        self.transcript_mode = transcript_mode
+        api_keys = LLM_API_KEYS or [key for key in (api_key or os.getenv("GEMINI_API_KEY"),) if key]
+        models = create_models(backend, model_name, api_keys, transcript_mode)
+        # Keyed by the pool's short key id, so raw keys are not kept around
+        self.models = {key_id(key): model for key, model in models.items()}
+        self.pool = None
+        if transcript_mode != "replay" and LLM_RPM_PER_KEY > 0 and LLM_TPM_PER_KEY > 0:
+            self.pool = KeyPool(list(models), LLM_RPM_PER_KEY, LLM_TPM_PER_KEY, LLM_RATE_LIMIT_PATH)
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.interactive_reserved = LLM_INTERACTIVE_RESERVED
+        self.weights = {INTERACTIVE: LLM_INTERACTIVE_WEIGHT, BULK: LLM_BULK_WEIGHT}
+        # asyncio primitives belong to one event loop, so keep a scheduler per loop
+        self._schedulers = weakref.WeakKeyDictionary()
+        self.latency = LatencyTracker()
+        # Cache hits would skip recording, and replay has its own answers
+        self.cache = None
+        if LLM_CACHE_MAX_MB > 0 and not transcript_mode:
+            self.cache = LLMCache(LLM_CACHE_PATH, int(LLM_CACHE_MAX_MB * 1024 * 1024))
+        # Replayed answers never reach Gemini, so there is nothing to trip on
+        self.breaker = CircuitBreaker(
+            self._probe,
+            window_seconds=LLM_BREAKER_WINDOW,
+            min_calls=LLM_BREAKER_MIN_CALLS,
+            failure_ratio=LLM_BREAKER_FAILURE_RATIO if transcript_mode != "replay" else 0,
+            slow_call_seconds=LLM_BREAKER_SLOW_CALL,
+            open_seconds=LLM_BREAKER_OPEN_SECONDS,
+        )
+        logger.info(f"✅ Shared LLM client ready ({backend}: {model_name})")
+
+    def generation_config(self, profile: str = "default", **overrides) -> dict:
+        """Settings for a call site's profile, with per-call overrides"""
+        return {**GENERATION_PROFILES.get(profile, {}), **overrides}
+
+    def _scheduler(self) -> FairScheduler:
+        loop = asyncio.get_running_loop()
+        scheduler = self._schedulers.get(loop)
+        if scheduler is None:
+            scheduler = self._schedulers[loop] = FairScheduler(
+                self.max_concurrency, self.interactive_reserved, self.weights
+            )
+        return scheduler
+
+    async def _acquire_key(self, reserved_tokens: int, timeout: float = LLM_QUEUE_TIMEOUT) -> str:
+        if self.pool is None:
+            return next(iter(self.models))
+        return await self.pool.acquire(reserved_tokens, max(0.0, timeout))
+
+    async def _release_key(self, chosen: str, reserved_tokens: int, prompt_tokens: int, text: str):
+        if self.pool is not None:
+            await asyncio.to_thread(self.pool.release, chosen, reserved_tokens,
+                                    prompt_tokens + len(text) // CHARS_PER_TOKEN)
+
+    def _call(self, chosen: str, contents, stream: bool, config: dict, timeout: float, site: Optional[str]):
+        kwargs = {"request_options": {"timeout": timeout}}
+        if config:
+            kwargs["generation_config"] = genai.types.GenerationConfig(**config)
+        if self.transcript_mode:
+            kwargs["site"] = site  # labels the transcript entry; not sent to Gemini
+        return self.models[chosen].generate_content(contents, stream=stream, **kwargs)
+
+    async def _probe(self):
+        """Smallest possible call, used by the breaker to see whether Gemini is back"""
+        chosen = await self._acquire_key(8, LLM_BREAKER_PROBE_TIMEOUT)
+        try:
+            await asyncio.wait_for(
+                asyncio.to_thread(self._call, chosen, "ping", False, {"max_output_tokens": 1},
+                                  LLM_BREAKER_PROBE_TIMEOUT, "llm_client.probe"),
+                LLM_BREAKER_PROBE_TIMEOUT
+            )
+        finally:
+            await self._release_key(chosen, 8, 8, "")
+
+    async def _attempt(self, contents, config: dict, call_deadline: float, site: Optional[str],
+                       prompt_tokens: int, reserved: int) -> str:
+        """One non-streaming call: take a key, ask Gemini, report the outcome"""
+        chosen = await self._acquire_key(reserved, min(LLM_QUEUE_TIMEOUT, call_deadline - time.monotonic()))
+        text = ""
+        started = time.monotonic()
+        try:
+            timeout = _remaining(call_deadline)
+            response = await asyncio.wait_for(
+                asyncio.to_thread(self._call, chosen, contents, False, config, timeout, site),
+                timeout
+            )
+            text = response.text
+            self.breaker.record(time.monotonic() - started)
+            self.latency.record(site, time.monotonic() - started)
+            return text
+        except asyncio.TimeoutError:
+            # Only counts against Gemini if it was slow, not because our own deadline was short
+            self.breaker.record(time.monotonic() - started)
+            raise
+        except Exception:
+            self.breaker.record(time.monotonic() - started, failed=True)
+            raise
+        finally:
+            await self._release_key(chosen, reserved, prompt_tokens, text)
+
+    async def _hedged(self, attempt, site: Optional[str], discard=None):
+        """Start a second attempt if the first is slower than usual for this site; first answer wins
+
+        ``discard`` releases the result of a losing attempt that finished anyway (e.g. an open
+        stream), which cancelling can no longer undo.
+        """
+        delay = self.latency.percentile(site, LLM_HEDGE_PERCENTILE)
+        if delay is None:
+            delay = LLM_HEDGE_DELAY
+        tasks = {asyncio.ensure_future(attempt())}
+        winner = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or self.breaker.state != "closed":
+                winner = next(iter(tasks))
+                return await winner
+            metrics.increment("llm.hedge.fired")
+            hedge = asyncio.ensure_future(attempt())
+            tasks.add(hedge)
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            metrics.increment("llm.hedge.won")
+                        winner = task
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()  # the loser; its worker thread finishes on its own, unread
+            if discard is not None:
+                for task in tasks:
+                    if task is not winner and task.done() and not task.cancelled() and task.exception() is None:
+                        await discard(task.result())
+
+    async def generate(self, contents, profile: str = "default", timeout: Optional[float] = None,
+                       site: Optional[str] = None, priority: str = BULK, hedge: bool = False,
+                       cache: bool = False, cache_if: Optional[Callable[[str], bool]] = None,
+                       **overrides) -> str:
+        """Return the full response text for a prompt (or a list of prompt parts, e.g. text and an image)
+
+        ``priority`` is "interactive" for calls a user is waiting on, "bulk" otherwise.
+        With ``hedge``, a duplicate call is sent once the first has taken longer than
+        LLM_HEDGE_PERCENTILE of recent calls from the same ``site``, and the first answer is
+        used. With ``cache``, an answer to the same prompt and settings from any service or
+        worker is reused for the site's CACHE_TTLS; ``cache_if`` can reject answers that
+        should not be kept (e.g. unparseable JSON). ``site`` also names the calling code in
+        recorded transcripts. The call never outlives an enclosing deadline() block.
+
+        Raises RateLimitExceeded if no key frees up within LLM_QUEUE_TIMEOUT, CircuitOpenError
+        while Gemini is down, and asyncio.TimeoutError (DeadlineExceeded if the request's
+        deadline had already passed before the call started).
+        """
+        config = self.generation_config(profile, **overrides)
+        key = None
+        if cache and self.cache is not None:
+            key = cache_key(self.model_name, contents, config)
+            cached = await asyncio.to_thread(self.cache.get, key, site)
+            if cached is not None:
+                return cached
+
+        text = await self._generate(contents, config, timeout, site, priority, hedge)
+        if key is not None and (cache_if is None or cache_if(text)):
+            await asyncio.to_thread(self.cache.set, key, text, CACHE_TTLS.get(site, LLM_CACHE_TTL), site)
+        return text
+
+    async def _generate(self, contents, config: dict, timeout: Optional[float], site: Optional[str],
+                        priority: str, hedge: bool) -> str:
+        call_deadline = time.monotonic() + time_left(timeout or self.timeout)
+        prompt_tokens = estimate_tokens(contents)
+        reserved = prompt_tokens + config.get("max_output_tokens", LLM_EXPECTED_OUTPUT_TOKENS)
+        self.breaker.check()
+        async with self._scheduler().slot(priority, _remaining(call_deadline)):
+            self.breaker.check()  # it may have opened while we were queued
+
+            def attempt():
+                return self._attempt(contents, config, call_deadline, site, prompt_tokens, reserved)
+
+            if hedge:
+                return await self._hedged(attempt, site)
+            return await attempt()
+
+    async def _open_stream(self, contents, config: dict, timeout: float, site: Optional[str],
+                           prompt_tokens: int, reserved: int):
+        """Take a key and start a streaming call; returns (key, chunk iterator, first chunk or None)"""
+        chosen = await self._acquire_key(reserved, time_left(LLM_QUEUE_TIMEOUT))
+        chunks = iterate_in_thread(lambda: self._call(chosen, contents, True, config, timeout, site))
+        started = time.monotonic()
+        try:
+            try:
+                first = await asyncio.wait_for(chunks.__anext__(), time_left(timeout))
+            except StopAsyncIteration:
+                first = None
+            self.breaker.record(time.monotonic() - started)
+            self.latency.record(site, time.monotonic() - started)
+            return chosen, chunks, first
+        except BaseException as error:
+            if isinstance(error, asyncio.TimeoutError):
+                self.breaker.record(time.monotonic() - started)
+            elif isinstance(error, Exception):
+                self.breaker.record(time.monotonic() - started, failed=True)
+            await self._close_stream(reserved, prompt_tokens, (chosen, chunks, None))
+            raise
+
+    async def _close_stream(self, reserved: int, prompt_tokens: int, opened, text: str = ""):
+        chosen, chunks, _ = opened
+        try:
+            await chunks.aclose()
+        finally:
+            await self._release_key(chosen, reserved, prompt_tokens, text)
+
+    async def stream(self, contents, profile: str = "default", timeout: Optional[float] = None,
+                     site: Optional[str] = None, priority: str = BULK, hedge: bool = False, **overrides):
+        """Yield response text chunks as Gemini produces them
+
+        Closing the generator early cancels the upstream stream. The breaker judges a
+        stream by its time to first chunk, and so does ``hedge``: a duplicate stream is
+        started if the first chunk is slower than usual for the ``site``, and whichever
+        stream answers first is read to the end. ``timeout`` applies to each chunk; an
+        enclosing deadline() bounds the whole stream. Gemini is read at full speed into a
+        buffer, so the scheduler slot and the key are given back when the answer is
+        complete, not when a slow reader (e.g. typing pacing) gets to the end of it.
+        """
+        timeout = timeout or self.timeout
+        config = self.generation_config(profile, **overrides)
+        self.breaker.check()
+        # Unbounded, but an answer is capped by max_output_tokens
+        buffered = asyncio.Queue()
+        pump = asyncio.ensure_future(self._pump_stream(buffered, contents, config, timeout, site, priority, hedge))
+        try:
+            while True:
+                item = await buffered.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            if not pump.done():
+                pump.cancel()
+            await asyncio.gather(pump, return_exceptions=True)
+
+    async def _pump_stream(self, buffered: asyncio.Queue, contents, config: dict, timeout: float,
+                           site: Optional[str], priority: str, hedge: bool):
+        """Read a whole stream into ``buffered``, then None; an error is put there instead of raised"""
+        prompt_tokens = estimate_tokens(contents)
+        reserved = prompt_tokens + config.get("max_output_tokens", LLM_EXPECTED_OUTPUT_TOKENS)
+        try:
+            async with self._scheduler().slot(priority, time_left(timeout)):
+                self.breaker.check()
+
+                def attempt():
+                    return self._open_stream(contents, config, timeout, site, prompt_tokens, reserved)
+
+                if hedge:
+                    opened = await self._hedged(
+                        attempt, site, discard=lambda loser: self._close_stream(reserved, prompt_tokens, loser)
+                    )
+                else:
+                    opened = await attempt()
+                _, chunks, chunk = opened
+                text = ""
+                started = time.monotonic()
+                try:
+                    while chunk is not None:
+                        text += chunk.text
+                        buffered.put_nowait(chunk.text)
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), time_left(timeout))
+                        except StopAsyncIteration:
+                            chunk = None
+                except asyncio.TimeoutError:
+                    self.breaker.record(time.monotonic() - started)
+                    raise
+                except Exception:
+                    self.breaker.record(time.monotonic() - started, failed=True)
+                    raise
+                finally:
+                    await self._close_stream(reserved, prompt_tokens, opened, text)
+        except Exception as error:
+            buffered.put_nowait(error)
+        else:
+            buffered.put_nowait(None)
+
+    def stats(self) -> dict:
+        """Client settings for health reporting"""
+        return {
+            "backend": self.backend,
+            "transcript_mode": self.transcript_mode or None,
+            "model": self.model_name,
+            "timeout_seconds": self.timeout,
+            "max_concurrency": self.max_concurrency,
+            "interactive_reserved": self.interactive_reserved,
+            "priority_weights": self.weights,
+            "rate_limit": self.pool.stats() if self.pool else None,
+            "circuit_breaker": self.breaker.stats() if self.breaker.enabled else None,
+            "cache": self.cache.stats() if self.cache else None,
+        }
+
+
+_client = None
+
+
+def get_client(api_key: Optional[str] = None) -> LLMClient:
+    """Return the process-wide client, creating it on first use"""
+    global _client
+    if _client is None:
+        _client = LLMClient(api_key)
+    return _client
@@ -0,0 +1,30 @@
+"""
+Lightweight in-process counters and gauges for the StudyPal backend services
+Exposed by each service's /metrics endpoint as plain JSON
+"""
+
+import threading
+from collections import Counter
+
+_counters = Counter()
+_gauges = {}
+_lock = threading.Lock()
+
+
+def increment(name: str, value: int = 1):
+    """Add value to the named counter"""
+    with _lock:
+        _counters[name] += value
+
+
+def set_gauge(name: str, value):
+    """Record the current value of something that goes up and down, e.g. a queue depth"""
+    with _lock:
+        _gauges[name] = value
+
+
+def snapshot(prefix: str = "") -> dict:
+    """Return a copy of all counters and gauges, optionally limited to names starting with prefix"""
+    with _lock:
+        values = {**_counters, **_gauges}
+    return {name: value for name, value in sorted(values.items()) if name.startswith(prefix)}
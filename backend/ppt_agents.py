@@ -4,10 +4,11 @@ Each agent specializes in a specific aspect of presentation creation
 """
 
 import json
-import asyncio
 import time
 from typing import Dict, List, Optional, Any
-import google.generativeai as genai
+from llm_client import get_client
+from llm_cache import is_json_answer
+from json_extract import extract_json
 from dataclasses import dataclass
 from enum import Enum
 import logging
@@ -35,46 +36,13 @@ class BaseAgent:
     def __init__(self, role: AgentRole, api_key: str):
         self.role = role
         self.api_key = api_key
-        self.model = None
+        self.llm = None
         self.initialize_model()
     
     def initialize_model(self):
-        """Initialize Gemini model with role-specific configuration"""
+        """Attach the shared Gemini client; role-specific settings live in llm_client.GENERATION_PROFILES"""
         try:
-            genai.configure(api_key=self.api_key)
-            
-            # Role-specific model configurations
-            configs = {
-                AgentRole.CONTENT_STRATEGIST: {
-                    'temperature': 0.8,
-                    'top_p': 0.9,
-                    'max_output_tokens': 3000
-                },
-                AgentRole.DESIGN_SPECIALIST: {
-                    'temperature': 0.7,
-                    'top_p': 0.8,
-                    'max_output_tokens': 2000
-                },
-                AgentRole.VISUAL_CURATOR: {
-                    'temperature': 0.9,
-                    'top_p': 0.95,
-                    'max_output_tokens': 1500
-                },
-                AgentRole.NARRATIVE_ARCHITECT: {
-                    'temperature': 0.6,
-                    'top_p': 0.85,
-                    'max_output_tokens': 2500
-                },
-                AgentRole.QUALITY_ASSURANCE: {
-                    'temperature': 0.3,
-                    'top_p': 0.7,
-                    'max_output_tokens': 2000
-                }
-            }
-            
-            config = configs.get(self.role, configs[AgentRole.CONTENT_STRATEGIST])
-            self.generation_config = genai.types.GenerationConfig(**config)
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
+            self.llm = get_client(self.api_key)
             
             logger.info(f"✅ {self.role.value} agent initialized")
         except Exception as e:
@@ -158,12 +126,9 @@ Tone: {tone}
 Audience: {audience}"""
 
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, 
-                lambda: self.model.generate_content(prompt, generation_config=self.generation_config)
-            )
+            response_text = await self.llm.generate(prompt, profile=self.role.value, site=f"ppt_agents.{self.role.value}")
             
-            content = json.loads(response.text.strip().replace('```json', '').replace('```', ''))
+            content = extract_json(response_text, site=f"ppt_agents.{self.role.value}", expect=dict)
             processing_time = time.time() - start_time
             
             # Calculate confidence score based on content completeness
@@ -321,12 +286,9 @@ Theme: {theme}
 Slides to design: {len(content_outline.get('slides', []))}"""
 
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.model.generate_content(prompt, generation_config=self.generation_config)
-            )
+            response_text = await self.llm.generate(prompt, profile=self.role.value, site=f"ppt_agents.{self.role.value}")
             
-            content = json.loads(response.text.strip().replace('```json', '').replace('```', ''))
+            content = extract_json(response_text, site=f"ppt_agents.{self.role.value}", expect=dict)
             processing_time = time.time() - start_time
             
             confidence_score = self._calculate_design_confidence(content)
@@ -484,12 +446,9 @@ Theme: {theme}
 Number of slides: {len(slides)}"""
 
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.model.generate_content(prompt, generation_config=self.generation_config)
-            )
+            response_text = await self.llm.generate(prompt, profile=self.role.value, site=f"ppt_agents.{self.role.value}")
             
-            content = json.loads(response.text.strip().replace('```json', '').replace('```', ''))
+            content = extract_json(response_text, site=f"ppt_agents.{self.role.value}", expect=dict)
             processing_time = time.time() - start_time
             
             confidence_score = self._calculate_visual_confidence(content)
@@ -635,12 +594,9 @@ Audience: {audience}
 Objectives: {objectives}"""
 
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.model.generate_content(prompt, generation_config=self.generation_config)
-            )
+            response_text = await self.llm.generate(prompt, profile=self.role.value, site=f"ppt_agents.{self.role.value}")
             
-            content = json.loads(response.text.strip().replace('```json', '').replace('```', ''))
+            content = extract_json(response_text, site=f"ppt_agents.{self.role.value}", expect=dict)
             processing_time = time.time() - start_time
             
             confidence_score = self._calculate_narrative_confidence(content)
@@ -783,12 +739,13 @@ OUTPUT FORMAT (JSON):
 Review all aspects thoroughly and provide actionable feedback."""
 
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.model.generate_content(prompt, generation_config=self.generation_config)
+            # Low-temperature review of the same deck: reuse an earlier verdict from the shared cache
+            response_text = await self.llm.generate(
+                prompt, profile=self.role.value, site=f"ppt_agents.{self.role.value}",
+                cache=True, cache_if=is_json_answer
             )
             
-            content = json.loads(response.text.strip().replace('```json', '').replace('```', ''))
+            content = extract_json(response_text, site=f"ppt_agents.{self.role.value}", expect=dict)
             processing_time = time.time() - start_time
             
             confidence_score = self._calculate_qa_confidence(content)
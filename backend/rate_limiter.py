@@ -0,0 +1,186 @@
+"""
+Shared Gemini rate limiting for the StudyPal backend services
+Token buckets per API key (requests and tokens per minute) kept in a local SQLite file,
+so every service and worker process on the machine draws from the same budget
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import weakref
+from typing import List
+
+import metrics
+
+DEFAULT_LIMITS_PATH = os.path.join(tempfile.gettempdir(), "studypal_llm_limits.sqlite3")
+
+
+class RateLimitExceeded(Exception):
+    """No key had capacity before the caller's queue deadline"""
+
+
+def key_id(api_key: str) -> str:
+    """Short, non-reversible name for a key, used in the shared store and in metrics"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+class KeyPool:
+    """Pick an API key with capacity for a call, waiting in line if every key is busy
+
+    Each key has two buckets that refill continuously: ``rpm`` requests and ``tpm`` tokens
+    per minute. A call reserves one request and its estimated tokens from the key with the
+    most capacity left; release() settles the reservation against the tokens actually used.
+    Callers in this process are served first come, first served, and give up with
+    RateLimitExceeded once their deadline passes.
+    """
+
+    def __init__(self, api_keys: List[str], rpm: float, tpm: float, path: str = DEFAULT_LIMITS_PATH):
+        if not api_keys:
+            raise ValueError("KeyPool needs at least one API key")
+        self.keys = [key_id(api_key) for api_key in api_keys]
+        self.rpm = rpm
+        self.tpm = tpm
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key_id TEXT PRIMARY KEY, requests REAL NOT NULL, "
+            "tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db_lock = threading.Lock()
+        self._lines = weakref.WeakKeyDictionary()
+
+    def _queue(self) -> asyncio.Lock:
+        # asyncio.Lock wakes waiters in arrival order, which makes it a FIFO queue (one per event loop)
+        loop = asyncio.get_running_loop()
+        line = self._lines.get(loop)
+        if line is None:
+            line = self._lines[loop] = asyncio.Lock()
+        return line
+
+    def _try_reserve(self, tokens: float):
+        """Reserve capacity on the least-loaded key; returns (key_id, None) or (None, seconds to wait)"""
+        now = time.time()
+        with self._db_lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = dict(
+                    (row[0], row[1:]) for row in self._db.execute(
+                        f"SELECT key_id, requests, tokens, updated_at FROM buckets WHERE key_id IN "
+                        f"({','.join('?' * len(self.keys))})",
+                        list(self.keys)
+                    )
+                )
+                best, best_room, wait = None, -1.0, None
+                levels = {}
+                for kid in self.keys:
+                    requests, token_level, updated_at = rows.get(kid, (self.rpm, self.tpm, now))
+                    elapsed = max(0.0, now - updated_at)
+                    requests = min(self.rpm, requests + elapsed * self.rpm / 60)
+                    token_level = min(self.tpm, token_level + elapsed * self.tpm / 60)
+                    levels[kid] = (requests, token_level)
+
+                    needed_tokens = min(tokens, self.tpm)  # an oversized call waits for a full bucket
+                    if requests >= 1 and token_level >= needed_tokens:
+                        room = min(requests / self.rpm, token_level / self.tpm)
+                        if room > best_room:
+                            best, best_room = kid, room
+                    else:
+                        key_wait = max(
+                            (1 - requests) * 60 / self.rpm if requests < 1 else 0.0,
+                            (needed_tokens - token_level) * 60 / self.tpm if token_level < needed_tokens else 0.0
+                        )
+                        wait = key_wait if wait is None else min(wait, key_wait)
+
+                if best is not None:
+                    requests, token_level = levels[best]
+                    levels[best] = (requests - 1, token_level - tokens)
+                for kid, (requests, token_level) in levels.items():
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO buckets (key_id, requests, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                        (kid, requests, token_level, now)
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return best, wait
+
+    async def acquire(self, tokens: float, timeout: float) -> str:
+        """Wait up to ``timeout`` seconds for a key with room for ``tokens``; returns its key id"""
+        deadline = time.monotonic() + timeout
+        metrics.increment("llm.ratelimit.requests")
+        try:
+            await asyncio.wait_for(self._queue().acquire(), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            metrics.increment("llm.ratelimit.rejected")
+            raise RateLimitExceeded("Timed out waiting in the Gemini request queue")
+
+        try:
+            waited = False
+            while True:
+                # SQLite may wait on other processes' locks, so keep it off the event loop
+                reserving = asyncio.ensure_future(asyncio.to_thread(self._try_reserve, tokens))
+                try:
+                    chosen, wait = await asyncio.shield(reserving)
+                except asyncio.CancelledError:
+                    reserving.add_done_callback(self._unclaimed(tokens))
+                    raise
+                if chosen is not None:
+                    if waited:
+                        metrics.increment("llm.ratelimit.delayed")
+                    metrics.increment(f"llm.ratelimit.key.{chosen}")
+                    return chosen
+                remaining = deadline - time.monotonic()
+                if wait > remaining:
+                    metrics.increment("llm.ratelimit.rejected")
+                    raise RateLimitExceeded(
+                        f"All {len(self.keys)} Gemini key(s) are at their rate limit; retry in {wait:.1f}s"
+                    )
+                waited = True
+                # Other processes share the buckets, so re-check rather than sleeping the full wait
+                await asyncio.sleep(min(wait, 1.0))
+        finally:
+            self._queue().release()
+
+    def _unclaimed(self, tokens: float):
+        """Done callback for a reservation whose caller was cancelled: give its tokens back"""
+        def give_back(reserving):
+            if not reserving.cancelled() and reserving.exception() is None:
+                chosen, _ = reserving.result()
+                if chosen is not None:
+                    asyncio.ensure_future(asyncio.to_thread(self.release, chosen, tokens, 0))
+        return give_back
+
+    def release(self, chosen: str, reserved_tokens: float, used_tokens: float):
+        """Return unused reserved tokens (or charge the overrun) once the call has finished
+
+        Blocks on SQLite, so async callers should run it in a thread.
+        """
+        adjustment = reserved_tokens - used_tokens
+        if not adjustment:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "UPDATE buckets SET tokens = MIN(?, tokens + ?) WHERE key_id = ?",
+                (self.tpm, adjustment, chosen)
+            )
+
+    def stats(self) -> dict:
+        """Current bucket levels per key, for health reporting"""
+        now = time.time()
+        with self._db_lock:
+            rows = self._db.execute("SELECT key_id, requests, tokens, updated_at FROM buckets").fetchall()
+        levels = {}
+        for kid, requests, token_level, updated_at in rows:
+            if kid in self.keys:
+                elapsed = max(0.0, now - updated_at)
+                levels[kid] = {
+                    "requests_available": round(min(self.rpm, requests + elapsed * self.rpm / 60), 2),
+                    "tokens_available": round(min(self.tpm, token_level + elapsed * self.tpm / 60)),
+                }
+        return {"keys": len(self.keys), "rpm_per_key": self.rpm, "tpm_per_key": self.tpm, "buckets": levels}
@@ -6,13 +6,15 @@ from typing import List, Dict, Optional
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import google.generativeai as genai
 import requests
 from datetime import datetime
 import uuid
 import re
 from urllib.parse import quote
 from dotenv import load_dotenv
+from llm_client import get_client
+from llm_cache import is_json_answer
+from json_extract import extract_json, iter_json_array, JSONExtractionError
 
 # Load environment variables
 load_dotenv()
@@ -153,8 +155,7 @@ async def generate_ai_resources(topic: str, difficulty: str = "All Levels", reso
         return await generate_enhanced_fallback_resources(topic, difficulty, resource_types, max_results)
     
     try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        llm = get_client(GEMINI_API_KEY)
         
         resource_categories = get_resource_categories()
         types_filter = resource_types if resource_types else list(resource_categories.keys())
@@ -199,13 +200,29 @@ Number of Resources: {max_results}
 
 Generate realistic, high-quality resources that would genuinely help someone learn {topic}."""
 
-        # Run the synchronous Gemini call in a thread pool
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, model.generate_content, prompt)
-        content = response.text.strip().replace('```json', '').replace('```', '')
+        # Parse resources as the answer streams in: generation stops once max_results have
+        # arrived, and a stream cut off midway still yields the complete resources
+        resources_data = []
+        resource_stream = iter_json_array(
+            llm.stream(prompt, site="resource_provider.generate_ai_resources"),
+            site="resource_provider.generate_ai_resources",
+            expect_items=dict
+        )
+        try:
+            async for resource_data in resource_stream:
+                resources_data.append(resource_data)
+                if len(resources_data) >= max_results:
+                    break
+        except Exception as e:
+            if not resources_data:
+                raise
+            print(f"⚠️ Resource stream ended early ({e}), keeping {len(resources_data)} resources")
+        finally:
+            await resource_stream.aclose()
         
         try:
-            resources_data = json.loads(content)
+            if not resources_data:
+                raise JSONExtractionError("No resources in the response")
             resources = []
             
             # Get real data for each resource type
@@ -299,7 +316,7 @@ Generate realistic, high-quality resources that would genuinely help someone lea
             print(f"✅ Generated {len(resources)} resources with real URLs and YouTube videos")
             return resources
             
-        except json.JSONDecodeError as e:
+        except JSONExtractionError as e:
             print(f"❌ JSON parsing error: {e}")
             return await generate_enhanced_fallback_resources(topic, difficulty, resource_types, max_results)
             
@@ -453,8 +470,7 @@ async def get_real_resource_urls(topic: str, resource_type: str) -> List[Dict]:
         if not GEMINI_API_KEY:
             return []
             
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        llm = get_client(GEMINI_API_KEY)
         
         prompt = f"""Find 3-4 real, working, high-quality {resource_type.lower()} for learning "{topic}". 
         
@@ -486,15 +502,16 @@ async def get_real_resource_urls(topic: str, resource_type: str) -> List[Dict]:
         
         Return ONLY the JSON array with real, working URLs."""
         
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, model.generate_content, prompt)
-        content = response.text.strip().replace('```json', '').replace('```', '')
+        # Same topic and type from another student reuses the links already found
+        response_text = await llm.generate(
+            prompt, site="resource_provider.get_real_resource_urls", cache=True, cache_if=is_json_answer
+        )
         
         try:
-            resources = json.loads(content)
+            resources = extract_json(response_text, site="resource_provider.get_real_resource_urls", expect=list)
             print(f"✅ Found {len(resources)} real {resource_type.lower()} URLs")
             return resources
-        except json.JSONDecodeError:
+        except JSONExtractionError:
             print(f"❌ Failed to parse LLM response for {resource_type}")
             return []
             
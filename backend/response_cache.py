@@ -0,0 +1,113 @@
+"""
+Response cache for repeated student questions
+In-memory LRU with TTL, plus an optional SQLite tier that survives restarts
+"""
+
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+_WHITESPACE_RE = re.compile(r'\s+')
+# Sentence punctuation at the edge of a word ("recursion?", "¿qué"); punctuation inside
+# a token ("C#", "1/2", "3.14", "f'(x)") changes the question, so it is kept
+_SENTENCE_PUNCTUATION_RE = re.compile(r"[.,!?;:…。、]+(?=\s|$)|(?:^|(?<=\s))[¿¡]+")
+
+
+def normalize_question(text: str) -> str:
+    """Fold case, sentence punctuation and whitespace so trivially different questions share a key"""
+    folded = unicodedata.normalize("NFKC", text).casefold()
+    without_punctuation = _SENTENCE_PUNCTUATION_RE.sub(" ", folded)
+    return _WHITESPACE_RE.sub(" ", without_punctuation).strip()
+
+
+class ResponseCache:
+    """Bounded LRU cache with per-entry TTL and an optional on-disk tier"""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 86400, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._db = None
+
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+
+    def get(self, question: str) -> Optional[str]:
+        """Return the cached response for a question, or None on a miss"""
+        key = normalize_question(question)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    value, expires_at = row
+                    self._remember(key, value, expires_at)
+                    self._stats["hits"] += 1
+                    self._stats["disk_hits"] += 1
+                    return value
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, question: str, response: str):
+        """Store a response under the question's normalized key"""
+        key = normalize_question(question)
+        if not key:
+            return
+        expires_at = time.time() + self.ttl_seconds
+
+        with self._lock:
+            self._remember(key, response, expires_at)
+            self._stats["stores"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, response, expires_at)
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        """Insert into the memory tier and evict least recently used entries (lock held)"""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def stats(self) -> dict:
+        """Hit/miss statistics for health reporting"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_tier": bool(self._db),
+            }
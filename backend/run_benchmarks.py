@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+StudyPal Backend Benchmarks
+Offline micro-benchmarks for the hot paths of the backend services
+
+Usage:
+    python run_benchmarks.py              # run every benchmark
+    python run_benchmarks.py highlighter  # run a single benchmark
+"""
+
+import asyncio
+import re
+import sys
+import time
+from pathlib import Path
+
+SAMPLE_ANSWER = """## Understanding Derivatives
+
+A derivative is a key concept in calculus. It measures how a function changes as its input changes.
+
+### Key Points
+* The derivative of a constant is always zero
+* The power rule is the first method most students learn
+* Use `d/dx` notation when you write the derivative of a function
+
+### Step-by-Step Example
+1. Start with f(x) = x^2 and apply the power rule
+2. Multiply by the exponent, then reduce it by one
+3. The answer is f'(x) = 2x, which you should memorize
+
+It usually takes 15 minutes to practice this, and about 90 percent of students solve it on the first try.
+See Chapter 3 and Part 2 of the study guide for a review of each important theorem.
+
+### Remember
+* Practice with a new example every day
+* Review the definition before an exam
+"""
+
+
+def split_stream_buffers(text: str):
+    """Split text the way StudyPalChat.generate_streaming_response buffers it"""
+    buffers = []
+    buffer = ""
+    for char in text:
+        buffer += char
+        if char in ['.', '!', '?', ':', '\n'] or len(buffer) >= 80:
+            buffers.append(buffer)
+            buffer = ""
+    if buffer:
+        buffers.append(buffer)
+    return buffers
+
+
+def time_per_call(func, inputs, repeat: int = 200) -> float:
+    """Return the mean wall time of one call in microseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in inputs:
+            func(item)
+    return (time.perf_counter() - start) / (repeat * len(inputs)) * 1e6
+
+
+def legacy_highlight_important_words(text: str) -> str:
+    """The original thirteen-pass StudyPalChat.highlight_important_words, kept for comparison"""
+    highlight_patterns = [
+        r'\b(definition|theorem|formula|equation|concept|principle|theory|hypothesis|analysis|conclusion|method|approach|technique|strategy)\b',
+        r'\b(function|variable|array|object|class|method|algorithm|syntax|debugging|compilation|loop|condition|statement)\b',
+        r'\b(derivative|integral|matrix|vector|polynomial|exponential|logarithm|trigonometry|algebra|geometry|calculus)\b',
+        r'\b(molecule|atom|electron|photon|DNA|RNA|protein|enzyme|catalyst|reaction|hypothesis|experiment|observation)\b',
+        r'\b(important|key|crucial|essential|fundamental|critical|significant|main|primary|basic|advanced|complex)\b',
+        r'\b(always|never|must|should|cannot|will not|definitely|absolutely|typically|usually|often|rarely)\b',
+        r'\b(study|learn|practice|review|understand|memorize|analyze|solve|calculate|explain|demonstrate|apply)\b',
+        r'\b(question|answer|solution|problem|example|step|process|procedure|instruction|guide|tutorial)\b',
+        r'\b(first|second|third|next|then|finally|conclusion|summary|overview|introduction|background)\b'
+    ]
+
+    highlighted_text = text
+    for pattern in highlight_patterns:
+        highlighted_text = re.sub(pattern, r'**\1**', highlighted_text, flags=re.IGNORECASE)
+    highlighted_text = re.sub(r'`([^`]+)`', r'**`\1`**', highlighted_text)
+    highlighted_text = re.sub(
+        r'\b(\d+(?:\.\d+)?)\s*(percent|%|degrees|minutes|seconds|hours|days|years)\b',
+        r'**\1 \2**',
+        highlighted_text,
+        flags=re.IGNORECASE
+    )
+    highlighted_text = re.sub(r'^(\d+\.)\s', r'**\1** ', highlighted_text, flags=re.MULTILINE)
+    highlighted_text = re.sub(
+        r'\b(Step \d+|Part \d+|Section \d+|Chapter \d+)\b',
+        r'**\1**',
+        highlighted_text,
+        flags=re.IGNORECASE
+    )
+    return highlighted_text
+
+
+def legacy_apply_final_formatting(text: str) -> str:
+    """The original whole-response StudyPalChat.apply_final_formatting, kept for comparison"""
+    text = re.sub(r'^(#{1,3})\s*(.+)$', r'\1 **\2**', text, flags=re.MULTILINE)
+    text = re.sub(r'^(\*|\-)\s*(.+)$', r'• **\2**', text, flags=re.MULTILINE)
+    text = re.sub(r'^(\d+\.)\s*(.+)$', r'**\1** \2', text, flags=re.MULTILINE)
+    text = re.sub(
+        r'\b(Key point|Important|Note|Remember|Tip|Warning|Example|Summary|Conclusion):\s*',
+        r'**\1:** ',
+        text,
+        flags=re.IGNORECASE
+    )
+    text = re.sub(r'^(#{1,3}\s+.+)$', r'\1\n', text, flags=re.MULTILINE)
+    text = re.sub(r'\n(#{1,3}\s)', r'\n\n\1', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text
+
+
+def bench_highlighter():
+    """Per-buffer latency of the chat word highlighter, legacy vs single-pass"""
+    from highlighter import highlight_important_words
+
+    buffers = split_stream_buffers(SAMPLE_ANSWER)
+    mismatches = [b for b in buffers if legacy_highlight_important_words(b) != highlight_important_words(b)]
+    if mismatches:
+        print(f"❌ Output differs from the legacy highlighter for {len(mismatches)} buffers")
+        return False
+
+    legacy_us = time_per_call(legacy_highlight_important_words, buffers)
+    engine_us = time_per_call(highlight_important_words, buffers)
+    print(f"   buffers per answer: {len(buffers)}")
+    print(f"   legacy (13 passes):  {legacy_us:8.2f} µs/call")
+    print(f"   single pass:         {engine_us:8.2f} µs/call")
+    print(f"   speedup:             {legacy_us / engine_us:8.2f}x")
+    return True
+
+
+def bench_stream_bridge():
+    """Concurrent /chat/stream-style consumers of a blocking chunk iterator on one event loop"""
+    from streaming import iterate_in_thread
+
+    clients, chunks, chunk_delay = 8, 10, 0.02
+
+    def slow_model_stream():
+        for i in range(chunks):
+            time.sleep(chunk_delay)  # stands in for waiting on the next Gemini chunk
+            yield f"chunk {i} "
+
+    async def inline_client():
+        return [chunk for chunk in slow_model_stream()]
+
+    async def bridged_client():
+        return [chunk async for chunk in iterate_in_thread(slow_model_stream)]
+
+    async def serve(client):
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        return time.perf_counter() - start
+
+    inline_s = asyncio.run(serve(inline_client))
+    bridged_s = asyncio.run(serve(bridged_client))
+    ideal_s = chunks * chunk_delay
+    print(f"   {clients} clients x {chunks} chunks, {chunk_delay * 1000:.0f} ms per chunk")
+    print(f"   blocking iteration:  {inline_s * 1000:8.1f} ms total")
+    print(f"   thread bridge:       {bridged_s * 1000:8.1f} ms total (one stream alone: {ideal_s * 1000:.0f} ms)")
+    return True
+
+
+def bench_formatter():
+    """End-of-stream formatting work and completion event size, full re-format vs incremental"""
+    import json
+    from formatter import StreamingFormatter
+    from highlighter import highlight_important_words
+
+    repeat = 200
+    answer = SAMPLE_ANSWER * 8  # a long multi-section answer
+    sentences = [highlight_important_words(b) for b in split_stream_buffers(answer)]
+    highlighted = "".join(sentences)
+
+    formatter = StreamingFormatter()
+    incremental = "".join(formatter.feed(s) for s in sentences) + formatter.finish()
+    if incremental != legacy_apply_final_formatting(highlighted):
+        print("❌ Incremental output differs from the legacy formatter")
+        return False
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        legacy_apply_final_formatting(highlighted)
+    legacy_tail_us = (time.perf_counter() - start) / repeat * 1e6
+
+    incremental_tail_us = 0.0
+    for _ in range(repeat):
+        formatter = StreamingFormatter()
+        for sentence in sentences:
+            formatter.feed(sentence)
+        start = time.perf_counter()
+        formatter.finish()
+        incremental_tail_us += time.perf_counter() - start
+    incremental_tail_us = incremental_tail_us / repeat * 1e6
+
+    legacy_event = json.dumps({"type": "complete", "full_response": incremental, "word_count": len(incremental.split())})
+    digest_event = json.dumps({"type": "complete", "response_length": len(incremental), "response_sha256": "0" * 64, "word_count": len(incremental.split())})
+    print(f"   answer: {len(highlighted)} chars in {len(sentences)} streamed sentences")
+    print(f"   full re-format at end:   {legacy_tail_us:8.1f} µs before the complete event")
+    print(f"   incremental finish():    {incremental_tail_us:8.1f} µs before the complete event")
+    print(f"   complete event:          {len(legacy_event)} -> {len(digest_event)} bytes")
+    return True
+
+
+def bench_sse():
+    """Transport writes and bytes per /chat/stream answer, per-event json+timestamp vs SSEWriter"""
+    import json
+    from datetime import datetime
+    from sse import SSEWriter, orjson
+    from highlighter import highlight_important_words
+
+    # Each model chunk releases a burst of highlighted sentences at once, like "raw" pacing
+    chunk_delay = 0.02
+    sentences = [highlight_important_words(b) for b in split_stream_buffers(SAMPLE_ANSWER)]
+    bursts = [sentences[i:i + 3] for i in range(0, len(sentences), 3)]
+
+    async def events():
+        yield {"type": "session", "session_id": "default", "done": False}
+        for burst in bursts:
+            await asyncio.sleep(chunk_delay)
+            for sentence in burst:
+                yield {"type": "content", "content": sentence, "highlighted": True, "done": False}
+        yield {"type": "complete", "message": "Response completed", "word_count": 120, "done": True}
+
+    async def legacy_writes():
+        return [
+            f"data: {json.dumps({**event, 'timestamp': datetime.now().isoformat()})}\n\n"
+            async for event in events()
+        ]
+
+    async def writer_writes():
+        return [chunk async for chunk in SSEWriter().stream(events())]
+
+    legacy = asyncio.run(legacy_writes())
+    batched = asyncio.run(writer_writes())
+
+    content_events = [{"type": "content", "content": s, "highlighted": True, "done": False} for s in sentences]
+    legacy_us = time_per_call(
+        lambda e: f"data: {json.dumps({**e, 'timestamp': datetime.now().isoformat()})}\n\n", content_events
+    )
+    writer_us = time_per_call(SSEWriter().frame, content_events)
+
+    legacy_bytes = sum(len(w.encode("utf-8")) for w in legacy)
+    batched_bytes = sum(len(w) for w in batched)
+    print(f"   {len(legacy)} events in {len(bursts)} model chunks, encoder: {'orjson' if orjson else 'json'}")
+    print(f"   per-event writes:    {len(legacy):4d} writes, {legacy_bytes:6d} bytes")
+    print(f"   SSEWriter batches:   {len(batched):4d} writes, {batched_bytes:6d} bytes")
+    print(f"   encode per event:    {legacy_us:6.2f} µs -> {writer_us:6.2f} µs")
+    return True
+
+
+def legacy_parse_agent_json(text: str):
+    """The parse the agents and resource provider used before json_extract"""
+    import json
+    return json.loads(text.strip().replace('```json', '').replace('```', ''))
+
+
+def bench_json_extract():
+    """Fallback rate and parse time on typical malformed model answers, strict parse vs json_extract"""
+    import json
+    from json_extract import parse_json
+
+    deck = {"slides": [{"slide_number": i, "title": f"Slide {i}", "talking_points": ["point"] * 4} for i in range(1, 9)]}
+    clean = json.dumps(deck, indent=2)
+    answers = [
+        "```json\n" + clean + "\n```",                                  # what the prompts ask for
+        "Here is the presentation plan you asked for:\n\n" + clean,       # leading prose
+        clean + "\n\nLet me know if you want any changes!",                # trailing prose
+        clean.replace("]\n    }", "],\n    }"),                           # trailing commas
+        "```json\n" + clean[:len(clean) * 2 // 3],                         # cut off at max_output_tokens
+        "```json\n" + json.dumps([{"title": "A", "url": "https://a.example"}] * 4, indent=2) + "\n```",
+    ]
+
+    def fallback_rate(parse):
+        failures = 0
+        for answer in answers:
+            try:
+                parse(answer)
+            except ValueError:
+                failures += 1
+        return failures / len(answers)
+
+    legacy_rate = fallback_rate(legacy_parse_agent_json)
+    tolerant_rate = fallback_rate(parse_json)
+    clean_answer = answers[:1]
+    legacy_us = time_per_call(legacy_parse_agent_json, clean_answer)
+    tolerant_us = time_per_call(parse_json, clean_answer)
+    repair_us = time_per_call(parse_json, answers[4:5])
+    print(f"   {len(answers)} answer shapes, {len(clean)} chars of JSON each")
+    print(f"   fallback rate:       {legacy_rate:6.0%} -> {tolerant_rate:6.0%}")
+    print(f"   clean answer parse:  {legacy_us:6.1f} µs -> {tolerant_us:6.1f} µs")
+    print(f"   truncated repair:    {repair_us:6.1f} µs")
+    return tolerant_rate == 0
+
+
+def bench_code_pipeline():
+    """/generate latency against a simulated Gemini, explanation after the code vs overlapping its stream"""
+    import os
+    # Offline only: the fake backend, no rate limiter and no cache between runs
+    os.environ.update({"LLM_BACKEND": "fake", "LLM_RPM_PER_KEY": "0", "LLM_CACHE_MAX_MB": "0", "LLM_TRANSCRIPT_MODE": ""})
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    import code_generator
+    from fake_llm import FakeGenerativeModel, FakeResponse, FakeStream, fake_answer
+
+    latency, tokens_per_second, runs = 0.2, 400, 3
+    long_code = "```python\n" + "\n\n".join(
+        f"def step_{i}(items):\n    \"\"\"Step {i} of the pipeline\"\"\"\n"
+        f"    return [item * {i} for item in items if item is not None]" for i in range(20)
+    ) + "\n```"
+
+    class LongCodeModel(FakeGenerativeModel):
+        def generate_content(self, contents, stream: bool = False, **kwargs):
+            text = fake_answer(contents) if "Briefly explain" in contents else long_code
+            if stream:
+                return FakeStream(text, self.latency, self.tokens_per_second, self.chunk_tokens)
+            time.sleep(self.latency + len(text) / 4 / self.tokens_per_second)
+            return FakeResponse(text)
+
+    llm = code_generator.llm
+    llm.models = dict.fromkeys(llm.models, LongCodeModel(latency=latency, tokens_per_second=tokens_per_second))
+    request = code_generator.CodeRequest(requirement="Process a list of numbers in steps", language="python")
+
+    async def sequential():
+        """The /generate flow before pipelining: the whole code answer, then the explanation call"""
+        answer = await llm.generate(code_generator.create_prompt(request), site="code_generator.generate_code",
+                                    priority="interactive")
+        code = code_generator.strip_code_fences(answer)
+        code_generator.extract_code_info(code, request.language)
+        return code, await code_generator.explain_code_start(code[:code_generator.EXPLANATION_CODE_CHARS], request.language)
+
+    async def pipelined():
+        response = await code_generator.generate_code(request)
+        return response.generated_code, response.explanation
+
+    async def serve(flow):
+        started = time.perf_counter()
+        for _ in range(runs):
+            result = await flow()
+        return (time.perf_counter() - started) / runs, result
+
+    sequential_s, expected = asyncio.run(serve(sequential))
+    pipelined_s, result = asyncio.run(serve(pipelined))
+    print(f"   {len(long_code)} chars of code, {latency * 1000:.0f} ms to first token, {tokens_per_second} tokens/s")
+    print(f"   sequential calls:    {sequential_s * 1000:8.1f} ms per request")
+    print(f"   pipelined calls:     {pipelined_s * 1000:8.1f} ms per request")
+    return result == expected and pipelined_s < sequential_s
+
+
+def legacy_extract_code_info(code: str, language: str) -> dict:
+    """The original line-regex code_generator.extract_code_info, kept for comparison"""
+    info = {"functions": [], "classes": [], "imports": [], "complexity": "medium"}
+    lines = code.split('\n')
+    if language.lower() == "python":
+        for line in lines:
+            line = line.strip()
+            if line.startswith('def '):
+                func_name = re.search(r'def\s+(\w+)', line)
+                if func_name:
+                    info["functions"].append(func_name.group(1))
+            elif line.startswith('class '):
+                class_name = re.search(r'class\s+(\w+)', line)
+                if class_name:
+                    info["classes"].append(class_name.group(1))
+            elif line.startswith('import ') or line.startswith('from '):
+                info["imports"].append(line)
+    elif language.lower() == "javascript":
+        for line in lines:
+            line = line.strip()
+            if 'function ' in line or '=>' in line:
+                func_match = re.search(r'(?:function\s+(\w+)|const\s+(\w+)\s*=)', line)
+                if func_match:
+                    func_name = func_match.group(1) or func_match.group(2)
+                    if func_name:
+                        info["functions"].append(func_name)
+            elif 'class ' in line:
+                class_match = re.search(r'class\s+(\w+)', line)
+                if class_match:
+                    info["classes"].append(class_match.group(1))
+            elif 'import ' in line or 'require(' in line:
+                info["imports"].append(line)
+    info["complexity"] = "high" if len(lines) > 100 else "medium" if len(lines) > 30 else "low"
+    return info
+
+
+def bench_code_analysis():
+    """extract_code_info on large generated files, line regexes vs ast/tokenizer with memoization"""
+    import code_analysis
+
+    python_unit = '''class Store{n}:
+    """Keeps items for part {n}"""
+
+    def __init__(self, items):
+        self.items = [item for item in items if item is not None]
+
+    async def load(self,
+                   source,
+                   retries=3):
+        for attempt in range(retries):
+            try:
+                return await source.fetch({n})
+            except IOError:
+                if attempt == retries - 1 and not self.items:
+                    raise
+        return None
+
+def helper_{n}(value):
+    # Normalize one value
+    return value * {n} if value else 0
+'''
+    javascript_unit = '''class Store{n} extends Base {{
+  constructor(items) {{
+    super();
+    this.items = items.filter(item => item != null);
+  }}
+
+  async load(source, retries = 3) {{
+    for (let attempt = 0; attempt < retries; attempt++) {{
+      try {{
+        return await source.fetch({n});
+      }} catch (error) {{
+        if (attempt === retries - 1 && !this.items.length) throw error;
+      }}
+    }}
+    return null;
+  }}
+}}
+
+// Normalize one value
+const helper{n} = (value) => value ? value * {n} : 0;
+'''
+    files = {
+        "python": "import os\nfrom typing import List\n\n" + "\n".join(python_unit.format(n=n) for n in range(100)),
+        "javascript": "import React from 'react';\n\n" + "\n".join(javascript_unit.format(n=n) for n in range(100)),
+    }
+
+    ok = True
+    for language, code in files.items():
+        legacy = legacy_extract_code_info(code, language)
+        analysis = code_analysis.analyze_code(code, language)
+        lines = code.count("\n") + 1
+
+        def first_pass(code):
+            code_analysis._cache.clear()
+            return code_analysis.analyze_code(code, language)
+
+        legacy_us = time_per_call(lambda code: legacy_extract_code_info(code, language), [code], repeat=20)
+        first_us = time_per_call(first_pass, [code], repeat=20)
+        memoized_us = time_per_call(lambda code: code_analysis.analyze_code(code, language), [code])
+        print(f"   {language}: {lines} lines, functions found "
+              f"{len(legacy['functions'])} -> {len(analysis['functions'])} "
+              f"(cyclomatic complexity {analysis['cyclomatic_complexity']})")
+        print(f"      line regexes:        {legacy_us:8.1f} µs")
+        print(f"      ast/tokenizer:       {first_us:8.1f} µs first time, {memoized_us:6.1f} µs memoized "
+              f"({legacy_us / memoized_us:.0f}x)")
+        ok = ok and len(analysis["functions"]) >= len(legacy["functions"]) and legacy_us / memoized_us >= 10
+
+    # The bracket check must accept valid JavaScript (regex literals, JSX) and still catch damage
+    syntax_samples = [
+        ("function escapeHtml(s) {\n  return s.replace(/\"/g, '&quot;').replace(/'/g, '&#39;');\n}\n", True),
+        ("const bare = s.replace(/\\(/g, '').replace(/[)\\]]/g, '');\n", True),
+        ("const half = (a + b) / 2 / total;\n", True),
+        ("function Item({ a, b, c }) {\n  return (<div><span>{a}</span>{b ? <b>{c}</b> : null}</div>);\n}\n", True),
+        ("const List = () => <ul>{items.map(i => <li key={i}>{i}</li>)}</ul>;\n", True),
+        ("function cut() {\n  return s.replace(/a/g, 'b');\n", False),
+        ("const view = (<div>{a</div>);\n", False),
+    ]
+    judged = sum((code_analysis.check_syntax(code, "javascript") is None) == valid for code, valid in syntax_samples)
+    print(f"   javascript syntax check: {judged}/{len(syntax_samples)} samples judged correctly")
+    ok = ok and judged == len(syntax_samples)
+    return ok
+
+
+BENCHMARKS = {
+    "highlighter": bench_highlighter,
+    "stream_bridge": bench_stream_bridge,
+    "formatter": bench_formatter,
+    "sse": bench_sse,
+    "json_extract": bench_json_extract,
+    "code_pipeline": bench_code_pipeline,
+    "code_analysis": bench_code_analysis,
+}
+
+
+def main():
+    """Run the requested benchmarks"""
+    sys.path.insert(0, str(Path(__file__).parent))
+    selected = sys.argv[1:] or list(BENCHMARKS)
+
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        print(f"❌ Unknown benchmark(s): {', '.join(unknown)}")
+        print(f"   Available: {', '.join(BENCHMARKS)}")
+        sys.exit(1)
+
+    print("⚡ StudyPal Backend Benchmarks")
+    print("=" * 40)
+    failed = False
+    for name in selected:
+        print(f"\n📊 {name}: {BENCHMARKS[name].__doc__}")
+        if BENCHMARKS[name]() is False:
+            failed = True
+    print("=" * 40)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
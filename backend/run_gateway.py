@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+StudyPal Gateway Runner
+Serves all backend services from one process instead of one uvicorn server per service
+
+Examples:
+    python run_gateway.py
+    GATEWAY_SERVICES=smart_canvas,code_generator GATEWAY_WORKERS=4 GATEWAY_PORT=8080 python run_gateway.py
+    GATEWAY_SERVICES=chat,content_generator,resource_provider GATEWAY_PORT=8081 python run_gateway.py
+"""
+
+import os
+import sys
+
+import uvicorn
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Port and worker processes for this gateway; GATEWAY_SERVICES picks what it serves
+GATEWAY_PORT = int(os.getenv("GATEWAY_PORT", "8080"))
+GATEWAY_WORKERS = int(os.getenv("GATEWAY_WORKERS", "1"))
+
+# Chat keeps its sessions, stream replays, in-memory response cache and broadcaster in the
+# process, so a gateway that serves it runs one worker; otherwise resume and shared answers break
+SINGLE_WORKER_SERVICES = {"chat"}
+
+
+def main():
+    """Run the gateway"""
+    from gateway import SERVICES, GATEWAY_SERVICES
+
+    workers = GATEWAY_WORKERS
+    pinned = SINGLE_WORKER_SERVICES.intersection(GATEWAY_SERVICES)
+    if workers > 1 and pinned:
+        print(f"⚠️  {', '.join(sorted(pinned))} keeps per-process state, running 1 worker instead of {workers}")
+        print("   Serve it from its own gateway to give the other services more workers")
+        workers = 1
+
+    print("🚀 Starting StudyPal Gateway...")
+    print(f"🌐 Server will be available at: http://localhost:{GATEWAY_PORT}")
+    print(f"⚙️  Workers: {workers}")
+    for name in GATEWAY_SERVICES:
+        prefix, _, port = SERVICES[name]
+        print(f"   {prefix:<12} {name} (was http://localhost:{port}), docs at {prefix}/docs")
+    print("🔧 Health Check: /health, counters: /metrics")
+    print("=" * 50)
+
+    try:
+        uvicorn.run(
+            "gateway:app",
+            host="0.0.0.0",
+            port=GATEWAY_PORT,
+            workers=workers,
+            log_level="info"
+        )
+    except KeyboardInterrupt:
+        print("\n👋 StudyPal Gateway stopped")
+    except Exception as e:
+        print(f"❌ Error starting server: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Priority-aware admission for LLM calls in the StudyPal backend services
+Interactive calls (chat, smart canvas) always have capacity of their own; bulk work
+(presentations, resource curation, content generation) shares what is left
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import metrics
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITY_CLASSES = (INTERACTIVE, BULK)
+
+
+class FairScheduler:
+    """Weighted fair queue in front of a fixed number of call slots
+
+    ``reserved`` slots can only be used by interactive calls, so a burst of bulk jobs never
+    takes the last slot away from a chat user. When both classes are waiting, freed slots
+    are handed out in proportion to ``weights`` (stride scheduling), first come, first
+    served within a class. A class with nobody waiting does not hold capacity back: bulk
+    work uses idle interactive slots up to ``capacity - reserved``, and interactive calls
+    can use every slot.
+    """
+
+    def __init__(self, capacity: int, reserved: int, weights: dict):
+        self.capacity = max(1, capacity)
+        self.reserved = min(max(0, reserved), self.capacity - 1)
+        self.weights = {name: max(float(weights.get(name, 1)), 0.001) for name in PRIORITY_CLASSES}
+        self.running = dict.fromkeys(PRIORITY_CLASSES, 0)
+        self.queues = {name: deque() for name in PRIORITY_CLASSES}
+        # Virtual finish times; the class with the smallest pass is served next
+        self._pass = dict.fromkeys(PRIORITY_CLASSES, 0.0)
+        self._clock = 0.0
+
+    def _has_room(self, priority: str) -> bool:
+        if sum(self.running.values()) >= self.capacity:
+            return False
+        if priority == BULK:
+            return self.running[BULK] < self.capacity - self.reserved
+        return True
+
+    def _admit(self, priority: str):
+        self.running[priority] += 1
+        self._clock = self._pass[priority]
+        self._pass[priority] += 1 / self.weights[priority]
+
+    def _dispatch(self):
+        """Hand free slots to waiters, lowest pass first"""
+        while True:
+            ready = [name for name in PRIORITY_CLASSES if self.queues[name] and self._has_room(name)]
+            if not ready:
+                return
+            priority = min(ready, key=lambda name: self._pass[name])
+            waiter = self.queues[priority].popleft()
+            if waiter.done():
+                continue  # cancelled while queued
+            self._admit(priority)
+            waiter.set_result(None)
+
+    def _publish(self, priority: str):
+        metrics.set_gauge(f"llm.scheduler.{priority}.queue_depth", len(self.queues[priority]))
+        metrics.set_gauge(f"llm.scheduler.{priority}.running", self.running[priority])
+
+    async def acquire(self, priority: str):
+        """Wait for a slot for a call of the given class"""
+        if priority not in self.queues:
+            raise ValueError(f"Unknown priority '{priority}' (expected one of {', '.join(PRIORITY_CLASSES)})")
+        metrics.increment(f"llm.scheduler.{priority}.requests")
+        if not self.queues[priority] and self._has_room(priority):
+            self._admit(priority)
+            self._publish(priority)
+            return
+
+        if not self.queues[priority]:
+            # A class that was idle rejoins at the current virtual time instead of cashing in old credit
+            self._pass[priority] = max(self._pass[priority], self._clock)
+        waiter = asyncio.get_running_loop().create_future()
+        self.queues[priority].append(waiter)
+        metrics.increment(f"llm.scheduler.{priority}.queued")
+        self._publish(priority)
+        started = time.perf_counter()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(priority)  # the slot arrived just as we were cancelled
+            else:
+                try:
+                    self.queues[priority].remove(waiter)
+                except ValueError:
+                    pass
+                self._publish(priority)
+            raise
+        metrics.increment(f"llm.scheduler.{priority}.wait_ms", round((time.perf_counter() - started) * 1000))
+        self._publish(priority)
+
+    def release(self, priority: str):
+        self.running[priority] -= 1
+        self._dispatch()
+        for name in PRIORITY_CLASSES:
+            self._publish(name)
+
+    @asynccontextmanager
+    async def slot(self, priority: str, timeout: float = None):
+        """Hold a call slot for the duration of the block, waiting at most ``timeout`` seconds for it"""
+        await asyncio.wait_for(self.acquire(priority), timeout)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "reserved_interactive": self.reserved,
+            "weights": self.weights,
+            "running": dict(self.running),
+            "queued": {name: len(queue) for name, queue in self.queues.items()},
+        }
@@ -0,0 +1,146 @@
+"""
+Per-session conversation memory for StudyPal Chat
+Each session keeps a bounded ring buffer of recent turns; idle sessions expire via a TTL heap
+"""
+
+import heapq
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+# Rough characters-per-token ratio for English text, used to budget prompt context
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate; good enough to keep prompts under a budget"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class ConversationSession:
+    """Recent turns of one conversation, oldest dropped first"""
+
+    __slots__ = ("turns", "expires_at")
+
+    def __init__(self, max_turns: int, expires_at: float):
+        self.turns = deque(maxlen=max_turns)
+        self.expires_at = expires_at
+
+
+class SessionStore:
+    """Bounded, expiring store of conversation sessions
+
+    Appending a turn and looking up a session are O(1). Each session has a single entry in
+    the expiry heap; touching a session only moves its expiry forward, and a stale heap entry
+    is re-queued when it reaches the top instead of being updated in place.
+    """
+
+    def __init__(self, max_turns: int = 10, token_budget: int = 2000, ttl_seconds: float = 1800,
+                 max_sessions: int = 10000):
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions = {}
+        self._expiry_heap = []
+        self._lock = threading.Lock()
+        self._stats = {"turns_recorded": 0, "context_builds": 0, "turns_trimmed": 0, "expired": 0, "evicted": 0}
+
+    def build_context(self, session_id: Optional[str]) -> str:
+        """Return the most recent turns that fit in the token budget, oldest first"""
+        if not session_id:
+            return ""
+
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None or not session.turns:
+                return ""
+            session.expires_at = now + self.ttl_seconds
+
+            selected = []
+            remaining = self.token_budget
+            for question, answer, tokens in reversed(session.turns):
+                if tokens > remaining:
+                    break
+                selected.append(f"Student: {question}\nStudyPal: {answer}")
+                remaining -= tokens
+            self._stats["context_builds"] += 1
+            self._stats["turns_trimmed"] += len(session.turns) - len(selected)
+
+        return "\n\n".join(reversed(selected))
+
+    def record_turn(self, session_id: Optional[str], question: str, answer: str):
+        """Append a completed question/answer pair to the session"""
+        if not session_id:
+            return
+
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = ConversationSession(self.max_turns, 0.0)
+                heapq.heappush(self._expiry_heap, (now + self.ttl_seconds, session_id))
+                while len(self._sessions) > self.max_sessions:
+                    self._evict_oldest()
+            session.expires_at = now + self.ttl_seconds
+
+            tokens = estimate_tokens(question) + estimate_tokens(answer)
+            session.turns.append((question, answer, tokens))
+            self._stats["turns_recorded"] += 1
+
+    def clear(self, session_id: str) -> bool:
+        """Forget a session; returns False if it did not exist"""
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None:
+                return False
+            # Drop its heap entry too: a session recreated under the same id would otherwise
+            # leave two entries for one session. Clearing is rare, so O(n) is fine here.
+            self._expiry_heap = [entry for entry in self._expiry_heap if entry[1] != session_id]
+            heapq.heapify(self._expiry_heap)
+            return True
+
+    def _expire(self, now: float):
+        """Drop idle sessions whose expiry has passed (lock held)"""
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            _, session_id = heapq.heappop(heap)
+            session = self._sessions.get(session_id)
+            if session is None:
+                continue
+            if session.expires_at > now:
+                # Touched since this entry was queued
+                heapq.heappush(heap, (session.expires_at, session_id))
+            else:
+                del self._sessions[session_id]
+                self._stats["expired"] += 1
+
+    def _evict_oldest(self):
+        """Drop the session closest to expiry to stay under max_sessions (lock held)"""
+        heap = self._expiry_heap
+        while heap:
+            expires_at, session_id = heapq.heappop(heap)
+            session = self._sessions.get(session_id)
+            if session is None:
+                continue
+            if session.expires_at > expires_at:
+                heapq.heappush(heap, (session.expires_at, session_id))
+                continue
+            del self._sessions[session_id]
+            self._stats["evicted"] += 1
+            return
+
+    def stats(self) -> dict:
+        """Session counts and settings for health reporting"""
+        with self._lock:
+            return {
+                **self._stats,
+                "active_sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "max_turns": self.max_turns,
+                "token_budget": self.token_budget,
+                "ttl_seconds": self.ttl_seconds,
+            }
@@ -1,7 +1,6 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-import google.generativeai as genai
 import os
 from PIL import Image
 import io
@@ -9,6 +8,8 @@ import json
 import uvicorn
 import re
 from dotenv import load_dotenv
+from llm_client import get_client
+from circuit_breaker import CircuitOpenError
 
 # Load environment variables
 load_dotenv()
@@ -30,8 +31,8 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     raise ValueError("Please set GEMINI_API_KEY in your .env file")
 
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-1.5-flash')
+# Shared Gemini client: async calls with timeouts and a process-wide concurrency cap
+llm = get_client(GEMINI_API_KEY)
 
 @app.get("/")
 async def root():
@@ -86,8 +87,7 @@ async def solve_problem(request: ImageRequest):
         
         # Get response from Gemini
         print("🤖 Sending request to Gemini AI...")
-        response = model.generate_content([prompt, image])
-        response_text = response.text.strip()
+        response_text = (await llm.generate([prompt, image], site="smart_canvas.solve_problem", priority="interactive")).strip()
         print(f"✅ Received response from Gemini: {len(response_text)} characters")
         
         # Extract information using regex
@@ -157,6 +157,20 @@ async def solve_problem(request: ImageRequest):
             "solution": response_text
         }
     
+    except CircuitOpenError as e:
+        # Gemini is down: answer right away instead of after a timeout
+        print(f"⚡ Skipping Gemini call: {str(e)}")
+        return {
+            "success": False,
+            "error": "The AI solver is temporarily unavailable. Please try again shortly.",
+            "retry_after": round(e.retry_after),
+            "problem_type": "Error",
+            "problem_description": "",
+            "solution": "",
+            "step_by_step": [],
+            "final_answer": "",
+            "confidence": "low"
+        }
     except Exception as e:
         print(f"❌ Error processing request: {str(e)}")
         return {
@@ -0,0 +1,339 @@
+"""
+Streaming helpers shared by the StudyPal backend services
+Bridges blocking SDK iterators (e.g. Gemini's stream=True responses) into async generators,
+stops them when the HTTP client goes away, and buffers streams so clients can reconnect
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Chunks buffered between the worker thread and the coroutine before the worker waits
+STREAM_QUEUE_SIZE = 32
+
+_ITEM = "item"
+_ERROR = "error"
+_DONE = "done"
+
+
+def cancel_upstream(source) -> bool:
+    """Best-effort abort of an in-flight SDK stream; returns True if a cancel hook was found"""
+    # Gemini's streaming response keeps the transport stream (gRPC or REST) in _iterator
+    for target in (source, getattr(source, "_iterator", None)):
+        for name in ("cancel", "close"):
+            method = getattr(target, name, None)
+            if callable(method):
+                try:
+                    method()
+                    return True
+                except Exception:
+                    continue
+    return False
+
+
+async def iterate_in_thread(open_iterator, max_buffered: int = STREAM_QUEUE_SIZE):
+    """Pull a blocking iterator on a worker thread and yield its items without blocking the event loop
+
+    ``open_iterator`` is called on the worker thread, so the request that starts the stream
+    does not block the loop either. At most ``max_buffered`` items are held in memory; when the
+    consumer falls behind, the worker waits instead of reading further ahead. If the consumer
+    stops early, the upstream stream is cancelled rather than read to completion.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    free_slots = threading.Semaphore(max_buffered)
+    stopped = threading.Event()
+    finished = threading.Event()
+    upstream = {}
+
+    def publish(kind, value=None):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (kind, value))
+        except RuntimeError:
+            # Event loop already closed; nobody is listening any more
+            stopped.set()
+
+    def worker():
+        try:
+            source = upstream["source"] = open_iterator()
+            if stopped.is_set():
+                cancel_upstream(source)
+                return
+            for item in source:
+                free_slots.acquire()
+                if stopped.is_set():
+                    cancel_upstream(source)
+                    return
+                publish(_ITEM, item)
+        except Exception as e:
+            if not stopped.is_set():
+                publish(_ERROR, e)
+            return
+        finally:
+            finished.set()
+        if not stopped.is_set():
+            publish(_DONE)
+
+    threading.Thread(target=worker, name="stream-bridge", daemon=True).start()
+
+    try:
+        while True:
+            kind, value = await queue.get()
+            if kind == _DONE:
+                return
+            if kind == _ERROR:
+                raise value
+            free_slots.release()
+            yield value
+    finally:
+        # Consumer finished or went away: tell the worker to stop reading and wake it if it is waiting
+        stopped.set()
+        free_slots.release()
+        if not finished.is_set() and "source" in upstream:
+            cancel_upstream(upstream["source"])
+
+
+async def _wait_for_disconnect(request):
+    """Return once the ASGI server reports that the client has disconnected"""
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def stop_on_disconnect(events, request, on_disconnect=None):
+    """Relay an async generator to a StreamingResponse until the client disconnects
+
+    The request body must already have been read. When the client goes away, the pending
+    step of ``events`` is cancelled and the generator is closed, which in turn cancels any
+    upstream stream opened through iterate_in_thread.
+    """
+    disconnect = asyncio.ensure_future(_wait_for_disconnect(request))
+    step = None
+    try:
+        while True:
+            step = asyncio.ensure_future(events.__anext__())
+            done, _ = await asyncio.wait({step, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+            if step not in done:
+                if on_disconnect:
+                    on_disconnect()
+                return
+            try:
+                item = step.result()
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        disconnect.cancel()
+        if step is not None and not step.done():
+            # Cancelling the pending step unwinds the generator, which closes it
+            step.cancel()
+        else:
+            await events.aclose()
+
+
+class Broadcaster:
+    """Fan one async stream out to any number of subscribers (single-flight)
+
+    The source is consumed once, by a pump task started with the first subscriber. Every
+    subscriber receives the full stream from the beginning, so late joiners catch up from
+    history before following live items. If every subscriber leaves before the source is
+    exhausted, the pump is cancelled, which closes the source.
+    """
+
+    def __init__(self, source, on_done=None):
+        self._source = source
+        self._on_done = on_done
+        self._history = []
+        self._error = None
+        self._done = False
+        self._changed = asyncio.Event()
+        self._pump_task = None
+        self._subscribers = 0
+        self._abandoned = False
+
+    @property
+    def joinable(self) -> bool:
+        """True while new subscribers can still attach to the live stream"""
+        return not self._done and not self._abandoned
+
+    async def _pump(self):
+        try:
+            async for item in self._source:
+                self._history.append(item)
+                self._wake()
+        except asyncio.CancelledError:
+            self._error = asyncio.CancelledError()
+        except Exception as e:
+            self._error = e
+        finally:
+            self._done = True
+            self._wake()
+            if self._on_done:
+                self._on_done()
+
+    def _wake(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self):
+        """Yield every item of the shared stream, starting from the first one"""
+        self._subscribers += 1
+        if self._pump_task is None:
+            self._pump_task = asyncio.ensure_future(self._pump())
+        position = 0
+        try:
+            while True:
+                changed = self._changed
+                if position < len(self._history):
+                    position += 1
+                    yield self._history[position - 1]
+                elif self._done:
+                    if self._error is not None:
+                        raise self._error
+                    return
+                else:
+                    await changed.wait()
+        finally:
+            self._subscribers -= 1
+            if self._subscribers == 0 and not self._done:
+                self._abandoned = True
+                self._pump_task.cancel()
+
+
+class ReplayBuffer:
+    """Run an event stream in the background and let clients attach or re-attach by event number
+
+    Events (dicts) are numbered from 1 in a ``seq`` field and the most recent ``max_events``
+    are kept, so a client that reconnects can resume after the last event it saw. When the
+    last subscriber leaves before the stream ends, the source keeps running for
+    ``grace_seconds`` to give the client a chance to come back; after that it is cancelled.
+    """
+
+    def __init__(self, source, max_events: int = 1000, grace_seconds: float = 10.0):
+        self._source = source
+        self._events = deque(maxlen=max_events)
+        self._next_seq = 1
+        self._error = None
+        self._done = False
+        self._changed = asyncio.Event()
+        self._subscribers = 0
+        self._grace_seconds = grace_seconds
+        self._grace_timer = None
+        self.finished_at = None
+        self._pump_task = asyncio.ensure_future(self._pump())
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def can_resume(self, after_seq: int) -> bool:
+        """True if every event after ``after_seq`` is still available"""
+        first_kept = self._next_seq - len(self._events)
+        return first_kept - 1 <= after_seq < self._next_seq and not isinstance(self._error, asyncio.CancelledError)
+
+    def cancel(self):
+        """Stop the source stream and release anyone waiting on it"""
+        self._pump_task.cancel()
+        if not self._done:
+            # The pump may not have started yet, in which case its cleanup never runs
+            self._error = asyncio.CancelledError()
+            self._finish()
+
+    async def _pump(self):
+        try:
+            async for event in self._source:
+                self._events.append({**event, "seq": self._next_seq})
+                self._next_seq += 1
+                self._wake()
+        except asyncio.CancelledError:
+            self._error = asyncio.CancelledError()
+        except Exception as e:
+            self._error = e
+        finally:
+            self._finish()
+
+    def _finish(self):
+        if not self._done:
+            self._done = True
+            self.finished_at = time.monotonic()
+        self._wake()
+
+    def _wake(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self, after_seq: int = 0):
+        """Yield every event numbered after ``after_seq``, then follow the live stream"""
+        self._subscribers += 1
+        if self._grace_timer is not None:
+            self._grace_timer.cancel()
+            self._grace_timer = None
+        position = after_seq + 1
+        try:
+            while True:
+                changed = self._changed
+                first_kept = self._next_seq - len(self._events)
+                if position < first_kept:
+                    raise LookupError("Subscriber fell behind the replay window")
+                if position < self._next_seq:
+                    event = self._events[position - first_kept]
+                    position += 1
+                    yield event
+                elif self._done:
+                    if isinstance(self._error, Exception):
+                        raise self._error
+                    return
+                else:
+                    await changed.wait()
+        finally:
+            self._subscribers -= 1
+            if self._subscribers == 0 and not self._done:
+                self._grace_timer = asyncio.get_running_loop().call_later(self._grace_seconds, self.cancel)
+
+
+class ReplayStore:
+    """Bounded registry of ReplayBuffers by stream id
+
+    Finished streams are kept for ``ttl_seconds`` so late reconnects can still replay them.
+    Beyond ``max_streams`` the oldest finished streams are dropped first; if every stream is
+    still running, the oldest one stops being resumable but keeps serving its subscribers.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, max_streams: int = 256, **buffer_options):
+        self.ttl_seconds = ttl_seconds
+        self.max_streams = max_streams
+        self._buffer_options = buffer_options
+        self._buffers = OrderedDict()
+
+    def start(self, stream_id: str, source) -> ReplayBuffer:
+        """Start buffering a new stream under ``stream_id``"""
+        self._evict()
+        buffer = self._buffers[stream_id] = ReplayBuffer(source, **self._buffer_options)
+        overflow = len(self._buffers) - self.max_streams
+        if overflow > 0:
+            finished = [key for key, kept in self._buffers.items() if kept.done][:overflow]
+            for key in finished:
+                del self._buffers[key]
+            while len(self._buffers) > self.max_streams:
+                # Never cancel a live stream here: its client would be cut off mid-answer
+                self._buffers.popitem(last=False)
+        return buffer
+
+    def get(self, stream_id: str):
+        """Return the buffer for a stream that can still be resumed, or None"""
+        self._evict()
+        return self._buffers.get(stream_id)
+
+    def _evict(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [
+            stream_id for stream_id, buffer in self._buffers.items()
+            if buffer.done and buffer.finished_at <= cutoff
+        ]
+        for stream_id in expired:
+            del self._buffers[stream_id]
+
+    def __len__(self):
+        return len(self._buffers)
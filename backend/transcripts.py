@@ -0,0 +1,171 @@
+"""
+Record and replay LLM calls for reproducible benchmarks
+Recording appends one JSON line per completed call (prompt hash, call site, response text, timing)
+to an append-only transcript; replay serves those responses with their original timing, offline
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from fake_llm import FakeResponse
+from streaming import cancel_upstream
+
+# Chunk boundaries are stored as [seconds since the call started, end offset in the response]
+_TIME_PRECISION = 4
+
+
+def prompt_key(contents, generation_config=None) -> str:
+    """Stable hash of the prompt parts and generation settings of a call"""
+    digest = hashlib.sha256()
+    parts = contents if isinstance(contents, (list, tuple)) else [contents]
+    for part in parts:
+        if isinstance(part, str):
+            digest.update(part.encode("utf-8"))
+        elif hasattr(part, "tobytes"):
+            digest.update(part.tobytes())  # PIL images, e.g. smart canvas drawings
+        else:
+            digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x00")
+    digest.update(repr(generation_config).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TranscriptWriter:
+    """Append-only JSON-lines file shared by every call in the process"""
+
+    _lock = threading.Lock()  # shared by every writer, e.g. one per API key
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def append(self, record: dict):
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as transcript:
+                transcript.write(line)
+
+
+def load_transcript(path: str) -> dict:
+    """Index a transcript by prompt key; a later recording of the same prompt wins"""
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, encoding="utf-8") as transcript:
+        for line in transcript:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a partially written last line from an interrupted run
+            records[record["key"]] = record
+    return records
+
+
+class _RecordingStream:
+    """Pass chunks through from the real stream and record them once it finishes"""
+
+    def __init__(self, source, on_complete, started: float):
+        self._source = source
+        self._on_complete = on_complete
+        self._started = started
+        self._cancelled = False
+
+    def __iter__(self):
+        text = ""
+        chunks = []
+        for chunk in self._source:
+            text += chunk.text
+            chunks.append([round(time.perf_counter() - self._started, _TIME_PRECISION), len(text)])
+            yield chunk
+        if not self._cancelled:
+            self._on_complete(text, chunks)
+
+    def close(self):
+        # Abandoned streams are not recorded; pass the cancel on to the real stream
+        self._cancelled = True
+        cancel_upstream(self._source)
+
+
+class RecordingModel:
+    """Wrap a model so every completed call is appended to a transcript"""
+
+    def __init__(self, model, path: str):
+        self._model = model
+        self._writer = TranscriptWriter(path)
+
+    def generate_content(self, contents, stream: bool = False, site: str = None, **kwargs):
+        key = prompt_key(contents, kwargs.get("generation_config"))
+        started = time.perf_counter()
+
+        def record(text, chunks):
+            self._writer.append({
+                "key": key,
+                "site": site,
+                "stream": stream,
+                "latency": round(time.perf_counter() - started, _TIME_PRECISION),
+                "chunks": chunks,
+                "response": text,
+            })
+
+        response = self._model.generate_content(contents, stream=stream, **kwargs)
+        if stream:
+            return _RecordingStream(response, record, started)
+        record(response.text, [])
+        return response
+
+
+class _ReplayStream:
+    """Re-emit a recorded stream with its original chunk boundaries and pacing"""
+
+    def __init__(self, record: dict, speed: float):
+        self._record = record
+        self._speed = speed
+        self._closed = False
+
+    def __iter__(self):
+        text = self._record["response"]
+        chunks = self._record["chunks"] or [[self._record["latency"], len(text)]]
+        started = time.perf_counter()
+        start = 0
+        for offset, end in chunks:
+            if self._closed:
+                return
+            if self._speed > 0:
+                delay = offset / self._speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            yield FakeResponse(text[start:end])
+            start = end
+
+    def close(self):
+        self._closed = True
+
+
+class ReplayModel:
+    """Serve recorded responses by prompt key instead of calling a model
+
+    ``speed`` scales the recorded timing: 1.0 replays it as recorded, 0 returns at once.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.records = load_transcript(path)
+        self.speed = speed
+        if not self.records:
+            raise ValueError(f"No recorded LLM calls found in {path}")
+
+    def generate_content(self, contents, stream: bool = False, site: str = None, **kwargs):
+        key = prompt_key(contents, kwargs.get("generation_config"))
+        record = self.records.get(key)
+        if record is None:
+            raise LookupError(f"No recorded response for this prompt (key {key[:12]}, site {site})")
+
+        if stream:
+            return _ReplayStream(record, self.speed)
+        if self.speed > 0:
+            time.sleep(record["latency"] / self.speed)
+        return FakeResponse(record["response"])